@@ -1,5 +1,7 @@
 from ..services.gemini_client import query_gemini
 from ..utils.sse import create_sse_event
+from .history import Turn, TurnStore, ROLE_MODEL
+from .prompts import PromptTemplate
 import logging
 
 SYSTEM_PROMPT = """ You are a warm, professional financial conversation agent. Your goal is to naturally engage with the user to gather detailed financial information while making them feel at ease. Use everyday language, stay friendly yet focused, and ask thoughtful follow-up questions when users seem unsure.
@@ -65,57 +67,52 @@ Use PROFILE_COMPLETE_SIGNAL when you have:
 - Age and location
 """
 
+# Used for profile-independent follow-ups; the answer is shared between users, so
+# the prompt deliberately carries no session history or profile details
+GENERAL_QUESTION_PROMPT = PromptTemplate("""You are a friendly financial educator. Answer the general question below clearly and concisely, in plain language, in a few short paragraphs at most.
+
+Explain the concept in general terms only. Do not assume anything about the person asking and do not give personalized advice.
+
+Question: {question}
+""")
+
+# Shared across sessions; every history starts with this same turn object
+SYSTEM_TURN = Turn(ROLE_MODEL, SYSTEM_PROMPT)
+
 # Persistent chat history for the session
-chat_history = []
+chat_history = TurnStore()
 
 def get_chat_history():
-    """Return the current chat history for use by other agents (e.g., summary agent)."""
-    return chat_history.copy()
+    """Return a read-only view of the chat history for use by other agents (e.g., summary agent)."""
+    return chat_history.view()
 
 def add_to_history(role, text):
-    chat_history.append({"role": role, "parts": [{"text": text}]})
+    chat_history.append(role, text)
 
 def build_gemini_messages(user_message=None):
     """Builds the message list for Gemini API, ensuring last message is from user."""
-    temp_history = chat_history.copy()
-    # Remove last model response if present
-    if temp_history and temp_history[-1]["role"] == "model":
-        temp_history = temp_history[:-1]
-    # Add new user message to context (not to chat_history yet)
-    if user_message:
-        temp_history.append({"role": "user", "parts": [{"text": user_message}]})
-    # Build messages list
-    messages = []
-    for msg in temp_history:
-        messages.append({"role": msg["role"], "parts": msg["parts"]})
-    # Defensive: ensure last message is from user
-    if not messages or messages[-1].get("role") != "user":
-        if user_message:
-            messages.append({"role": "user", "parts": [{"text": user_message}]})
-    return messages
-
-async def handle_user_message(user_message: str = None):
+    return chat_history.wire_messages(user_message)
+
+async def handle_user_message(user_message: str = None, agent: str = "conversation"):
     """Handles a user message, updates chat history, and streams Gemini response."""
-    global chat_history
     async def event_stream():
         # If chat_history is empty, start with system prompt and send only that to Gemini
         if not chat_history:
-            add_to_history("model", SYSTEM_PROMPT)
-            messages = [{"role": "model", "parts": [{"text": SYSTEM_PROMPT}]}]
+            chat_history.append_turn(SYSTEM_TURN)
+            messages = [SYSTEM_TURN.to_wire()]
         else:
             messages = build_gemini_messages(user_message)
         logging.info(f"Message being sent to Gemini: {messages}")
         # Query Gemini
-        result = await query_gemini(messages)
+        result = await query_gemini(messages, agent=agent)
         # If successful, update chat_history with the new user message and model response
         if result.get('candidates'):
             if user_message:
                 add_to_history("user", user_message)
-            if result['candidates'][0].get('content'):
-                model_response = result['candidates'][0]['content']
-                if 'role' not in model_response:
-                    model_response['role'] = 'model'
-                chat_history.append(model_response)
+            parts = result['candidates'][0].get('content', {}).get('parts')
+            if parts:
+                # Keep only the reply text, not the raw content object
+                add_to_history("model", parts[0].get('text', ''))
         # Log the raw Gemini API response for debugging
         logging.basicConfig(level=logging.INFO)
         logging.info(f"Gemini API raw response: {result}")
@@ -133,4 +130,17 @@ async def handle_user_message(user_message: str = None):
             print(f"[SSE DEBUG] Output content: {output}")
             # Use the utility to format the SSE event
             yield await create_sse_event(output)
-    return event_stream()
\ No newline at end of file
+    return event_stream()
+
+async def answer_general_question(question: str):
+    """Answer a profile-independent question without any session context. Returns None on failure."""
+    messages = [{"role": "user", "parts": [{"text": GENERAL_QUESTION_PROMPT.render(question=question)}]}]
+    try:
+        result = await query_gemini(messages, agent="followup")
+        candidates = result.get('candidates')
+        if candidates and candidates[0].get('content', {}).get('parts'):
+            return candidates[0]['content']['parts'][0].get('text') or None
+        logging.error(f"General question answer unavailable: {result.get('error')}")
+    except Exception as e:
+        logging.error(f"Error answering general question: {e}")
+    return None
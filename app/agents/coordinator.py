@@ -1,143 +1,243 @@
 # app/agents/coordinator.py
+from collections import deque
 from enum import Enum
 from typing import Dict, Any, Optional
+import asyncio
 import logging
+import time
+import uuid
 from datetime import datetime
-from .conversations import handle_user_message as conversation_handler, get_chat_history, chat_history
+from .conversations import handle_user_message as conversation_handler, answer_general_question, get_chat_history, add_to_history, chat_history
+from .history import build_transcript
+from .prompts import PromptTemplate
+from .profiles import apply_patch, diff_profiles, invalid_fields
+from ..services.answer_cache import answer_cache, is_profile_independent
+from ..services.gemini_client import clear_deadline
+from ..services.session_store import archive_session
 from ..utils.sse import create_sse_event
 
+COMPLETENESS_PROMPT = PromptTemplate("""Analyze this financial conversation and determine if we have gathered enough information to create a comprehensive financial profile.
+
+We need information about:
+1. Current financial situation (income, expenses, savings, job, location)
+2. Financial goals (short-term, medium-term, long-term)
+3. Risk tolerance and investment experience
+4. Lifestyle preferences and future aspirations
+
+Conversation:
+{conversation_text}
+Respond with only one word: "COMPLETE" if we have sufficient information across most categories, or "INCOMPLETE" if we need more information in major categories.
+""")
+
 class WorkflowStage(Enum):
     CONVERSATION = "conversation"
     PROFILE_EXTRACTION = "profile_extraction"
     RECOMMENDATION = "recommendation"
     COMPLETE = "complete"
 
+class WorkflowEvent(Enum):
+    PROFILE_SIGNAL = "profile_signal"                  # Conversational agent emitted PROFILE_COMPLETE_SIGNAL
+    PROFILE_SUFFICIENT = "profile_sufficient"          # Post-turn completeness check passed
+    PROFILE_EXTRACTED = "profile_extracted"
+    RECOMMENDATIONS_READY = "recommendations_ready"
+
+# (current stage, event) -> next stage. Anything not listed is ignored.
+TRANSITIONS = {
+    (WorkflowStage.CONVERSATION, WorkflowEvent.PROFILE_SIGNAL): WorkflowStage.PROFILE_EXTRACTION,
+    (WorkflowStage.CONVERSATION, WorkflowEvent.PROFILE_SUFFICIENT): WorkflowStage.PROFILE_EXTRACTION,
+    (WorkflowStage.PROFILE_EXTRACTION, WorkflowEvent.PROFILE_EXTRACTED): WorkflowStage.RECOMMENDATION,
+    (WorkflowStage.RECOMMENDATION, WorkflowEvent.RECOMMENDATIONS_READY): WorkflowStage.COMPLETE,
+}
+
+# Handler used for user input in each stage
+STAGE_HANDLERS = {
+    WorkflowStage.CONVERSATION: "_handle_conversation_stage",
+    WorkflowStage.PROFILE_EXTRACTION: "_handle_pipeline_stage",
+    WorkflowStage.RECOMMENDATION: "_handle_pipeline_stage",
+    WorkflowStage.COMPLETE: "_handle_followup_questions",
+}
+
+# Background work started when a stage is entered (task name, coroutine method)
+STAGE_ENTRY_TASKS = {
+    WorkflowStage.PROFILE_EXTRACTION: ("profile_extraction", "_run_profile_extraction"),
+    WorkflowStage.RECOMMENDATION: ("recommendation", "_run_recommendations"),
+}
+
+PROFILE_COMPLETE_SIGNAL = "PROFILE_COMPLETE_SIGNAL"
+COMPLETENESS_CHECK_MIN_TURNS = 4
+RECENT_TRANSITIONS = 20
+
 class AgentCoordinator:
     def __init__(self):
+        self.session_id = uuid.uuid4().hex
+        self.session_started_at = datetime.now()
         self.current_stage = WorkflowStage.CONVERSATION
         self.user_profile = None
         self.recommendations = None
         self.profile_extracted_at = None
         self.recommendations_generated_at = None
         self.conversation_turn_count = 0
+        self.profile_versions = []
+        self.stage_entered_at = time.monotonic()
+        self.transitions = deque(maxlen=RECENT_TRANSITIONS)
+        self.transition_hooks = [self._log_transition]
+        self.task_durations = {}
+        self._tasks = {}
+        self._pending_message = None
+        self._profile_lock = asyncio.Lock()
         
     async def process_user_input(self, user_message: str = None):
         """Main entry point for processing user input through the agent workflow"""
         logging.info(f"[COORDINATOR] Current stage: {self.current_stage.value}")
-        if self.current_stage == WorkflowStage.CONVERSATION:
-            logging.info("[COORDINATOR] Handling CONVERSATION stage.")
-            return await self._handle_conversation_stage(user_message)
-        elif self.current_stage == WorkflowStage.PROFILE_EXTRACTION:
-            logging.info("[COORDINATOR] Handling PROFILE_EXTRACTION stage.")
-            return await self._handle_profile_extraction_stage()
-        elif self.current_stage == WorkflowStage.RECOMMENDATION:
-            logging.info("[COORDINATOR] Handling RECOMMENDATION stage.")
-            return await self._handle_recommendation_stage()
-        elif self.current_stage == WorkflowStage.COMPLETE:
-            logging.info("[COORDINATOR] Handling COMPLETE stage (follow-up questions).")
-            return await self._handle_followup_questions(user_message)
-        else:
-            logging.info("[COORDINATOR] Unknown stage, sending status response.")
-            return await self._create_status_response()
+        return await getattr(self, STAGE_HANDLERS[self.current_stage])(user_message)
+    
+    def add_transition_hook(self, hook):
+        """Register hook(record) called on every stage transition with its timing"""
+        self.transition_hooks.append(hook)
+    
+    def _log_transition(self, record):
+        logging.info(f"[COORDINATOR] {record['from']} --{record['event']}--> {record['to']} "
+                     f"(spent {record['stage_seconds']}s in {record['from']})")
+    
+    def _fire(self, event: WorkflowEvent) -> bool:
+        """Apply a transition event from the table; returns False if it does not apply to the current stage"""
+        next_stage = TRANSITIONS.get((self.current_stage, event))
+        if next_stage is None:
+            logging.info(f"[COORDINATOR] Ignoring {event.value} in stage {self.current_stage.value}")
+            return False
+        now = time.monotonic()
+        record = {
+            "from": self.current_stage.value,
+            "to": next_stage.value,
+            "event": event.value,
+            "at": datetime.now().isoformat(),
+            "stage_seconds": round(now - self.stage_entered_at, 3),
+        }
+        self.current_stage = next_stage
+        self.stage_entered_at = now
+        self.transitions.append(record)
+        for hook in self.transition_hooks:
+            try:
+                hook(record)
+            except Exception as e:
+                logging.error(f"[COORDINATOR] Transition hook failed: {e}")
+        entry = STAGE_ENTRY_TASKS.get(next_stage)
+        if entry is not None:
+            name, method = entry
+            self._spawn(name, getattr(self, method)())
+        return True
+    
+    def _spawn(self, name: str, coro, detached: bool = False):
+        """
+        Run stage work as a supervised background task. The task keeps the deadline
+        of the request that started it, since that response waits for the result;
+        `detached` work that no response waits on runs without one.
+        """
+        async def supervised():
+            if detached:
+                clear_deadline()
+            started = time.monotonic()
+            try:
+                await coro
+            except asyncio.CancelledError:
+                logging.info(f"[COORDINATOR] Task {name} cancelled")
+                raise
+            except Exception as e:
+                logging.error(f"[COORDINATOR] Task {name} failed: {e}")
+            finally:
+                self.task_durations[name] = round(time.monotonic() - started, 3)
+                if self._tasks.get(name, (None,))[0] is task:
+                    del self._tasks[name]
+        task = asyncio.ensure_future(supervised())
+        self._tasks[name] = (task, time.monotonic())
+        return task
+    
+    async def _wait_for(self, name: str):
+        entry = self._tasks.get(name)
+        if entry is not None:
+            # asyncio.wait neither cancels the stage work when a client disconnects
+            # nor raises if the work itself is cancelled by a reset
+            await asyncio.wait([entry[0]])
+    
+    def in_progress(self):
+        now = time.monotonic()
+        return [{"task": name, "elapsed_seconds": round(now - started, 3)} for name, (_, started) in self._tasks.items()]
     
     async def _handle_conversation_stage(self, user_message: str = None):
         """Handle the conversation stage with profile gathering"""
+        if user_message:
+            self.conversation_turn_count += 1
+            logging.info(f"[COORDINATOR] Conversation turn count: {self.conversation_turn_count}")
         response_stream = await conversation_handler(user_message)
         async def stream():
+            signalled = False
             async for chunk in response_stream:
-                # Signal-based transition: look for PROFILE_COMPLETE_SIGNAL in output
-                if chunk and "PROFILE_COMPLETE_SIGNAL" in chunk:
-                    logging.info("[COORDINATOR] PROFILE_COMPLETE_SIGNAL detected in conversation stream. Transitioning to PROFILE_EXTRACTION stage.")
-                    self.current_stage = WorkflowStage.PROFILE_EXTRACTION
-                    yield await create_sse_event("\n---\n\n[COORDINATOR] PROFILE_COMPLETE_SIGNAL detected. Moving to summary agent...")
-                    logging.info("[COORDINATOR] Extracting profile using summary agent (signal-based).")
-                    await self._extract_profile()
-                    yield await create_sse_event("\nProfile extracted successfully!")
-                    logging.info("[COORDINATOR] Transitioning to RECOMMENDATION stage.")
-                    yield await create_sse_event("\n---\n\n[COORDINATOR] Moving to recommendation agent...")
-                    self.current_stage = WorkflowStage.RECOMMENDATION
-                    # Stream recommendations to frontend
-                    async for next_chunk in self._handle_recommendation_stage():
-                        yield next_chunk
-                    # Do not return here; let the generator finish naturally
+                if chunk and PROFILE_COMPLETE_SIGNAL in chunk:
+                    signalled = True
                 yield chunk
-        if user_message:
-            self.conversation_turn_count += 1
-            logging.info(f"[COORDINATOR] Conversation turn count: {self.conversation_turn_count}")
-        # Fallback: if signal not detected, use completeness check
-        if self.conversation_turn_count >= 4:
-            is_complete = await self._is_profile_complete()
-            logging.info(f"[COORDINATOR] Profile completeness check result: {is_complete}")
-            if is_complete:
-                logging.info("[COORDINATOR] Sufficient information gathered. Transitioning to PROFILE_EXTRACTION stage.")
-                self.current_stage = WorkflowStage.PROFILE_EXTRACTION
-                # Yield profile extraction and recommendation events in order
-                async def combined_stream():
-                    await self._extract_profile()
-                    yield await create_sse_event("\nProfile extracted successfully!")
-                    self.current_stage = WorkflowStage.RECOMMENDATION
-                    async for next_chunk in self._handle_recommendation_stage():
-                        yield next_chunk
-                # Do not return here; let the generator finish naturally
+            # Post-turn checks run only once the reply has been streamed
+            if signalled and self._fire(WorkflowEvent.PROFILE_SIGNAL):
+                yield await create_sse_event("\n---\n\n[COORDINATOR] PROFILE_COMPLETE_SIGNAL detected. Moving to summary agent...")
+                async for chunk in self._stream_pipeline():
+                    yield chunk
+            elif (self.current_stage == WorkflowStage.CONVERSATION
+                  and self.conversation_turn_count >= COMPLETENESS_CHECK_MIN_TURNS
+                  and "completeness_check" not in self._tasks):
+                # Fallback when the signal was not emitted; runs in the background, not on this turn
+                self._spawn("completeness_check", self._run_completeness_check(), detached=True)
         return stream()
     
-    async def _create_enhanced_stream_with_transition(self, original_stream):
-        async def enhanced_stream():
-            async for chunk in original_stream:
-                yield chunk
-            yield await create_sse_event("\n\n---\n\n**Analysis Complete!** I have all the information I need. Let me now:")
-            yield await create_sse_event("\nExtract and organize your financial profile...")
-            logging.info("[COORDINATOR] Extracting profile using summary agent.")
-            await self._extract_profile()
+    async def _handle_pipeline_stage(self, user_message: str = None):
+        """Profile extraction / recommendation in progress: wait for it and stream the result"""
+        return self._stream_pipeline(user_message)
+    
+    async def _stream_pipeline(self, user_message: str = None):
+        if self.current_stage == WorkflowStage.PROFILE_EXTRACTION:
+            yield await create_sse_event("🔄 Analyzing your financial profile...")
+            await self._wait_for("profile_extraction")
             yield await create_sse_event("\nProfile extracted successfully!")
-            logging.info("[COORDINATOR] Transitioning to RECOMMENDATION stage.")
-            self.current_stage = WorkflowStage.RECOMMENDATION
-            # Immediately start recommendation stage after profile extraction
-            async for chunk in self._handle_recommendation_stage():
+        if self.current_stage == WorkflowStage.RECOMMENDATION:
+            yield await create_sse_event("\n---\n\n[COORDINATOR] Moving to recommendation agent...")
+            await self._wait_for("recommendation")
+        if self._pending_message:
+            message, self._pending_message = self._pending_message, None
+            logging.info("[COORDINATOR] Streaming recommendations to frontend")
+            yield await create_sse_event(message)
+        if user_message and self.current_stage == WorkflowStage.COMPLETE:
+            # The user wrote while the pipeline was running; answer it after the recommendations
+            async for chunk in await self._handle_followup_questions(user_message):
                 yield chunk
-        # Do not return here; let the generator finish naturally
-        return enhanced_stream()
-    async def _handle_profile_extraction_stage(self):
-        logging.info("[COORDINATOR] PROFILE_EXTRACTION stage: extracting profile.")
+    
+    async def _run_completeness_check(self):
+        is_complete = await self._is_profile_complete()
+        logging.info(f"[COORDINATOR] Profile completeness check result: {is_complete}")
+        if is_complete:
+            self._fire(WorkflowEvent.PROFILE_SUFFICIENT)
+    
+    async def _run_profile_extraction(self):
         await self._extract_profile()
-        self.current_stage = WorkflowStage.RECOMMENDATION
-        logging.info("[COORDINATOR] Transitioning to RECOMMENDATION stage.")
-        # Immediately start recommendation stage after profile extraction
-        # Return a generator that yields both profile extraction and recommendation events
-        async def combined_stream():
-            yield await create_sse_event("\nProfile extracted successfully!")
-            async for chunk in self._handle_recommendation_stage():
-                yield chunk
-        # Do not return here; let the generator finish naturally
-        return combined_stream()
-    async def _handle_recommendation_stage(self):
-        logging.info("[COORDINATOR] Entering _handle_recommendation_stage")
+        self._fire(WorkflowEvent.PROFILE_EXTRACTED)
+    
+    async def _run_recommendations(self):
         try:
             from .recommendations import generate_recommendations
             if self.user_profile:
+                profile_version = len(self.profile_versions)
                 self.recommendations = await generate_recommendations(self.user_profile)
+                self.recommendations["profile_version"] = profile_version
                 self.recommendations_generated_at = datetime.now()
                 logging.info(f"Recommendations generated successfully at {self.recommendations_generated_at}")
                 recommendations_text = self.recommendations.get('recommendations_text', '')
                 chat_msg = f"\n**Your Personalized Financial Recommendations:**\n\n{recommendations_text}\n\n---\n\n💬 **What's Next?** Feel free to ask me any questions about these recommendations or request clarification on any specific points!"
-                chat_history.append({"role": "model", "parts": [{"text": chat_msg}]})
-                self.current_stage = WorkflowStage.COMPLETE
-                logging.info("[COORDINATOR] Streaming recommendations to frontend")
-                logging.info("[COORDINATOR] Exiting _handle_recommendation_stage (COMPLETE)")
-                yield await create_sse_event(chat_msg)
-                # Do not return here; let the generator finish naturally
+                add_to_history("model", chat_msg)
+                self._pending_message = chat_msg
             else:
                 logging.info("[COORDINATOR] No user profile, cannot generate recommendations")
-                self.current_stage = WorkflowStage.COMPLETE
-                logging.info("[COORDINATOR] Exiting _handle_recommendation_stage (COMPLETE - error)")
-                yield await create_sse_event("I apologize, but I couldn't generate specific recommendations at this time. Please try asking me specific questions about your financial situation.")
-                # Do not return here; let the generator finish naturally
+                self._pending_message = "I apologize, but I couldn't generate specific recommendations at this time. Please try asking me specific questions about your financial situation."
         except Exception as e:
             logging.error(f"Error generating recommendations: {e}")
-            self.current_stage = WorkflowStage.COMPLETE
-            logging.info("[COORDINATOR] Exiting _handle_recommendation_stage (COMPLETE - fallback)")
-            yield await create_sse_event("I apologize, but I encountered an issue generating specific recommendations. Please try again later.")
-            # Do not return here; let the generator finish naturally
+            self._pending_message = "I apologize, but I encountered an issue generating specific recommendations. Please try again later."
+        self._fire(WorkflowEvent.RECOMMENDATIONS_READY)
     
     async def _is_profile_complete(self) -> bool:
         """
@@ -152,34 +252,11 @@ class AgentCoordinator:
             if len(history) < 4:  # Need minimum conversation
                 return False
             
-            # Build conversation text
-            conversation_text = ""
-            for msg in history:
-                role = msg.get("role", "")
-                if role in ["user", "model"]:
-                    parts = msg.get("parts", [])
-                    if parts and "text" in parts[0]:
-                        speaker = "User" if role == "user" else "Assistant"
-                        conversation_text += f"{speaker}: {parts[0]['text']}\n"
-            
-            # Check completeness using LLM
-            completeness_prompt = f"""
-            Analyze this financial conversation and determine if we have gathered enough information to create a comprehensive financial profile.
-
-            We need information about:
-            1. Current financial situation (income, expenses, savings, job, location)
-            2. Financial goals (short-term, medium-term, long-term)
-            3. Risk tolerance and investment experience
-            4. Lifestyle preferences and future aspirations
-
-            Conversation:
-            {conversation_text}
-
-            Respond with only one word: "COMPLETE" if we have sufficient information across most categories, or "INCOMPLETE" if we need more information in major categories.
-            """
+            # Check completeness using LLM, reusing the session's incremental transcript
+            completeness_prompt = COMPLETENESS_PROMPT.render(conversation_text=build_transcript(history))
             
             messages = [{"role": "user", "parts": [{"text": completeness_prompt}]}]
-            result = await query_gemini(messages)
+            result = await query_gemini(messages, agent="completeness")
             
             if result.get('candidates') and result['candidates'][0].get('content'):
                 response = result['candidates'][0]['content']['parts'][0].get('text', '').strip().upper()
@@ -198,38 +275,137 @@ class AgentCoordinator:
             conversation_history = get_chat_history()
             self.user_profile = await extract_profile_from_conversation(conversation_history)
             self.profile_extracted_at = datetime.now()
+            self._record_profile_version("extraction", [])
             logging.info(f"Profile extracted successfully at {self.profile_extracted_at}")
         except Exception as e:
             logging.error(f"Error in profile extraction: {e}")
             self.user_profile = {"error": "Could not extract profile", "timestamp": datetime.now().isoformat()}
     
     
+    def _record_profile_version(self, source: str, diff):
+        self.profile_versions.append({
+            "version": len(self.profile_versions) + 1,
+            "source": source,
+            "profile": self.user_profile,
+            "diff": diff,
+            "created_at": datetime.now().isoformat()
+        })
+    
+    async def update_profile(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a partial profile update as a new version and regenerate only the affected recommendation sections"""
+        # Updates are applied one at a time, each on top of the recommendations of the previous one
+        async with self._profile_lock:
+            # Let in-flight extraction/recommendation finish first, so the update is not
+            # overwritten by work that started from the older profile
+            await self._wait_for("profile_extraction")
+            await self._wait_for("recommendation")
+            return await self._apply_profile_update(changes)
+    
+    async def _apply_profile_update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.user_profile or "error" in self.user_profile:
+            return {"status": "error", "message": "No profile has been extracted yet"}
+        from .summary import load_profile_schema
+        invalid = invalid_fields(changes, load_profile_schema())
+        if invalid:
+            return {"status": "error", "message": f"Unknown or invalid profile fields: {', '.join(invalid)}"}
+        
+        updated = apply_patch(self.user_profile, changes)
+        diff = diff_profiles(self.user_profile, updated)
+        if not diff:
+            return {"status": "unchanged", "version": len(self.profile_versions), "diff": []}
+        self.user_profile = updated
+        self._record_profile_version("patch", diff)
+        logging.info(f"[COORDINATOR] Profile updated to version {len(self.profile_versions)}: {[d['field'] for d in diff]}")
+        
+        response = {"status": "updated", "version": len(self.profile_versions), "diff": diff}
+        if not self.recommendations or "error" in self.recommendations:
+            return response
+        
+        from .recommendations import generate_recommendations, sections_affected_by
+        affected = sections_affected_by(d["field"] for d in diff)
+        recommendations = await generate_recommendations(updated, sections=affected, previous=self.recommendations)
+        if "error" in recommendations:
+            # Keep serving the previous recommendations rather than replacing them with an error
+            response["recommendations_error"] = recommendations["error"]
+            return response
+        recommendations["profile_version"] = len(self.profile_versions)
+        self.recommendations = recommendations
+        self.recommendations_generated_at = datetime.now()
+        add_to_history("model", f"\n**Your Updated Recommendations:**\n\n{recommendations['recommendations_text']}")
+        regenerated = recommendations["regenerated_sections"]
+        response["regenerated_sections"] = regenerated
+        response["reused_sections"] = [key for key in recommendations["sections"] if key not in regenerated]
+        response["recommendations"] = recommendations
+        return response
+    
     async def _handle_followup_questions(self, user_message: str):
-        response_stream = await conversation_handler(user_message)
+        if self._pending_message:
+            # Recommendations finished in the background and have not been shown yet
+            return self._stream_pipeline(user_message)
+        if user_message and is_profile_independent(user_message):
+            async def general_stream():
+                answer = answer_cache.lookup(user_message)
+                if answer is not None:
+                    logging.info("[COORDINATOR] Serving follow-up from answer cache.")
+                else:
+                    # Answered without session history, so it is safe to share with other users
+                    answer = await answer_general_question(user_message)
+                    if answer:
+                        answer_cache.store(user_message, answer)
+                if answer:
+                    add_to_history("user", user_message)
+                    add_to_history("model", answer)
+                    yield await create_sse_event(answer)
+                    return
+                # Fall back to the regular (personalized, never cached) follow-up reply
+                async for chunk in await conversation_handler(user_message, agent="followup"):
+                    yield chunk
+            return general_stream()
+        if user_message:
+            answer_cache.record_bypass()
+        response_stream = await conversation_handler(user_message, agent="followup")
         async def stream():
             async for chunk in response_stream:
                 yield chunk
         return stream()
     
-    async def _create_status_response(self):
-        """Create a status response for processing states"""
-        status_messages = {
-            WorkflowStage.PROFILE_EXTRACTION: "🔄 Analyzing your financial profile...",
-            WorkflowStage.RECOMMENDATION: "💡 Generating personalized investment recommendations..."
+    def snapshot(self) -> Dict[str, Any]:
+        """Export record for the current session"""
+        return {
+            "session_id": self.session_id,
+            "stage": self.current_stage.value,
+            "started_at": self.session_started_at.isoformat(),
+            "updated_at": datetime.now().isoformat(),
+            "conversation_turns": self.conversation_turn_count,
+            "profile_version": len(self.profile_versions),
+            "profile": self.user_profile,
+            "profile_extracted_at": self.profile_extracted_at.isoformat() if self.profile_extracted_at else None,
+            "recommendations": self.recommendations,
+            "recommendations_generated_at": self.recommendations_generated_at.isoformat() if self.recommendations_generated_at else None
         }
-        message = status_messages.get(self.current_stage, "Processing...")
-        async def status_stream():
-            yield await create_sse_event(message)
-        return status_stream()
     
     def reset(self):
-        """Reset the coordinator state"""
+        """Archive the current session and reset the coordinator state"""
+        if self.conversation_turn_count or self.user_profile:
+            try:
+                archive_session(self.snapshot())
+            except Exception as e:
+                logging.error(f"Error archiving session {self.session_id}: {e}")
+        self.session_id = uuid.uuid4().hex
+        self.session_started_at = datetime.now()
+        for task, _ in list(self._tasks.values()):
+            task.cancel()
+        self._tasks = {}
+        self._pending_message = None
+        self.transitions.clear()
+        self.stage_entered_at = time.monotonic()
         self.current_stage = WorkflowStage.CONVERSATION
         self.user_profile = None
         self.recommendations = None
         self.profile_extracted_at = None
         self.recommendations_generated_at = None
         self.conversation_turn_count = 0
+        self.profile_versions = []
         chat_history.clear()
 
 # Global coordinator instance
@@ -245,11 +421,21 @@ async def get_workflow_status():
         "current_stage": coordinator.current_stage.value,
         "profile_extracted": coordinator.user_profile is not None,
         "recommendations_ready": coordinator.recommendations is not None,
+        "recommendations_pending_delivery": coordinator._pending_message is not None,
         "conversation_turns": coordinator.conversation_turn_count,
         "profile_extracted_at": coordinator.profile_extracted_at.isoformat() if coordinator.profile_extracted_at else None,
-        "recommendations_generated_at": coordinator.recommendations_generated_at.isoformat() if coordinator.recommendations_generated_at else None
+        "recommendations_generated_at": coordinator.recommendations_generated_at.isoformat() if coordinator.recommendations_generated_at else None,
+        "stage_seconds": round(time.monotonic() - coordinator.stage_entered_at, 3),
+        "in_progress": coordinator.in_progress(),
+        "last_task_seconds": coordinator.task_durations,
+        "recent_transitions": list(coordinator.transitions),
+        "answer_cache": answer_cache.stats()
     }
 
+async def update_profile(changes: Dict[str, Any]):
+    """Apply a partial profile update (PATCH /profile)"""
+    return await coordinator.update_profile(changes)
+
 async def reset_workflow():
     """Reset the workflow"""
     coordinator.reset()
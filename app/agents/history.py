@@ -0,0 +1,136 @@
+# app/agents/history.py
+"""
+Compact conversation turn storage.
+
+Turns are stored as slotted (role, text) pairs with interned roles; the
+Gemini wire format ({"role", "parts": [{"text"}]}) is only built when a
+request is about to be sent. Other agents read the history through a
+copy-free, read-only view.
+"""
+import sys
+from collections.abc import Sequence
+from itertools import islice
+
+ROLE_USER = sys.intern("user")
+ROLE_MODEL = sys.intern("model")
+
+# Speaker labels used when a history is rendered as a plain-text transcript
+SPEAKERS = {ROLE_USER: "User", ROLE_MODEL: "Assistant"}
+
+
+class Turn:
+    __slots__ = ("role", "text")
+
+    def __init__(self, role: str, text: str):
+        self.role = sys.intern(role)
+        self.text = text
+
+    def to_wire(self) -> dict:
+        return {"role": self.role, "parts": [{"text": self.text}]}
+
+    def __repr__(self):
+        return f"Turn({self.role!r}, {self.text[:40]!r})"
+
+
+class HistoryView(Sequence):
+    """Read-only view over the turns present when the view was taken"""
+    __slots__ = ("_store", "_turns", "_length")
+
+    def __init__(self, store, turns, length):
+        self._store = store
+        self._turns = turns
+        self._length = length
+
+    def transcript(self) -> str:
+        # Reuse the store's incremental transcript unless the store was cleared since
+        if self._store._turns is self._turns:
+            return self._store.transcript(self._length)
+        return build_transcript(islice(self._turns, self._length))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._turns[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return self._turns[index]
+
+
+class TurnStore:
+    """Append-only list of turns for a single conversation"""
+    __slots__ = ("_turns", "_transcript", "_transcript_len")
+
+    def __init__(self):
+        self._turns = []
+        self._transcript = ""
+        self._transcript_len = 0
+
+    def append(self, role: str, text: str):
+        self._turns.append(Turn(role, text))
+
+    def append_turn(self, turn: Turn):
+        """Append an existing (shared) turn object, e.g. the static system prompt"""
+        self._turns.append(turn)
+
+    def clear(self):
+        # Rebind rather than clear in place so outstanding views stay valid
+        self._turns = []
+        self._transcript = ""
+        self._transcript_len = 0
+
+    def view(self) -> HistoryView:
+        return HistoryView(self, self._turns, len(self._turns))
+
+    def transcript(self, length: int = None) -> str:
+        """Plain-text transcript of the first `length` turns, extended incrementally"""
+        if length is None:
+            length = len(self._turns)
+        if length < self._transcript_len:
+            return build_transcript(islice(self._turns, length))
+        if length > self._transcript_len:
+            self._transcript += build_transcript(islice(self._turns, self._transcript_len, length))
+            self._transcript_len = length
+        return self._transcript
+
+    def wire_messages(self, user_message: str = None) -> list:
+        """Gemini messages for the next request, ending with a user turn"""
+        turns = self._turns
+        end = len(turns)
+        # Drop the last model response if present
+        if end and turns[end - 1].role == ROLE_MODEL:
+            end -= 1
+        messages = [turns[i].to_wire() for i in range(end)]
+        if user_message:
+            messages.append({"role": ROLE_USER, "parts": [{"text": user_message}]})
+        return messages
+
+    def __len__(self):
+        return len(self._turns)
+
+    def __iter__(self):
+        return iter(self._turns)
+
+    def __bool__(self):
+        return bool(self._turns)
+
+
+def iter_turns(history):
+    """Yield (role, text) from Turn objects or Gemini-style message dicts"""
+    for msg in history:
+        if isinstance(msg, Turn):
+            yield msg.role, msg.text
+        else:
+            parts = msg.get("parts", [])
+            if parts and "text" in parts[0]:
+                yield msg.get("role", ""), parts[0]["text"]
+
+
+def build_transcript(history) -> str:
+    """Render user and model turns as "User: ..." / "Assistant: ..." lines"""
+    if isinstance(history, (TurnStore, HistoryView)):
+        return history.transcript()
+    return "".join(f"{SPEAKERS[role]}: {text}\n" for role, text in iter_turns(history) if role in SPEAKERS)
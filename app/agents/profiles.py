@@ -0,0 +1,47 @@
+# app/agents/profiles.py
+"""
+Profile versioning helpers: applying partial updates and diffing versions.
+"""
+import copy
+from typing import Any, Dict, List
+
+def apply_patch(profile: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a new profile with `patch` merged in. Nested objects are merged
+    field by field; any other value (including lists and null) replaces the old one.
+    """
+    merged = copy.deepcopy(profile)
+    def merge(target, changes):
+        for key, value in changes.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                merge(target[key], value)
+            else:
+                target[key] = copy.deepcopy(value)
+    merge(merged, patch)
+    return merged
+
+def diff_profiles(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> List[Dict[str, Any]]:
+    """Field-level differences as [{"field": "a.b.c", "old": ..., "new": ...}]"""
+    changes = []
+    for key in list(old) + [k for k in new if k not in old]:
+        path = f"{prefix}{key}"
+        old_value, new_value = old.get(key), new.get(key)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changes.extend(diff_profiles(old_value, new_value, prefix=f"{path}."))
+        elif old_value != new_value:
+            changes.append({"field": path, "old": old_value, "new": new_value})
+    return changes
+
+def invalid_fields(patch: Dict[str, Any], schema: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Dotted paths in `patch` that are not in the profile schema, or that replace an object with a non-object"""
+    invalid = []
+    for key, value in patch.items():
+        path = f"{prefix}{key}"
+        if key not in schema:
+            invalid.append(path)
+        elif isinstance(schema[key], dict):
+            if isinstance(value, dict):
+                invalid.extend(invalid_fields(value, schema[key], prefix=f"{path}."))
+            else:
+                invalid.append(path)
+    return invalid
@@ -0,0 +1,71 @@
+# app/agents/prompts.py
+"""
+Prompt assembly helpers shared by the agents.
+
+Templates are parsed once at import time into literal and field pieces, so
+rendering is a single join. Static fields (like the profile schema) can be
+bound ahead of time with `partial`. JSON embedded in prompts is minified and,
+for profiles, stripped of empty values to keep prompts short.
+"""
+import json
+from string import Formatter
+from typing import Any
+
+
+class PromptTemplate:
+    """A str.format-style template compiled into literal/field pieces
+
+    Only plain `{name}` fields are supported; format specs, conversions and
+    attribute/index lookups raise ValueError rather than being ignored.
+    """
+    __slots__ = ("_pieces", "fields")
+
+    def __init__(self, template: str = "", _pieces=None):
+        if _pieces is None:
+            _pieces = []
+            for literal, field, spec, conversion in Formatter().parse(template):
+                if literal:
+                    _pieces.append((False, literal))
+                if field is not None:
+                    if spec or conversion:
+                        raise ValueError(f"Unsupported format spec or conversion in field {{{field}}}")
+                    if not field.isidentifier():
+                        raise ValueError(f"Unsupported field name {{{field}}}")
+                    _pieces.append((True, field))
+        self._pieces = tuple(_pieces)
+        self.fields = frozenset(name for is_field, name in self._pieces if is_field)
+
+    def partial(self, **values) -> "PromptTemplate":
+        """Bind some fields now, merging adjacent literals"""
+        pieces = []
+        for is_field, text in self._pieces:
+            if is_field and text in values:
+                is_field, text = False, str(values[text])
+            if not is_field and pieces and not pieces[-1][0]:
+                pieces[-1] = (False, pieces[-1][1] + text)
+            else:
+                pieces.append((is_field, text))
+        return PromptTemplate(_pieces=pieces)
+
+    def render(self, **values) -> str:
+        return "".join(str(values[text]) if is_field else text for is_field, text in self._pieces)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def prune_nulls(value: Any) -> Any:
+    """Drop None values and empty containers, recursively"""
+    if isinstance(value, dict):
+        pruned = {k: prune_nulls(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v is not None and v != {} and v != []}
+    if isinstance(value, list):
+        pruned = [prune_nulls(v) for v in value]
+        return [v for v in pruned if v is not None and v != {} and v != []]
+    return value
+
+
+def compact_profile_json(profile: Any) -> str:
+    """Minified, null-pruned profile JSON for prompts"""
+    return compact_json(prune_nulls(profile))
@@ -1,39 +1,163 @@
 # agents/recommendations.py
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
 from ..services.gemini_client import query_gemini
+from ..services.market_data import get_market_context
+from .prompts import PromptTemplate, compact_profile_json
 
 RECOMMENDATION_PROMPT = """
 You are a financial recommendation agent. Based on the user's structured financial profile (JSON below) and current market conditions, suggest suitable investment instruments and strategies for the user's goals.
 
-Be specific and practical. Use the user's risk profile, goals, and financial situation. If you have access to live market data (MCP), incorporate it. If not, use general best practices for the current market environment.
+Be specific and practical. Use the user's risk profile, goals, and financial situation. If market data is provided below, incorporate it. If not, use general best practices for the current market environment.
 
-Return your recommendations as a plain text summary, not JSON. Be clear, concise, and actionable.
+Return your recommendations as plain text, not JSON. Be clear, concise, and actionable. Organize the response under exactly these markdown headings, in this order, and write nothing outside them:
+{section_headings}
+{reused_sections}
+Market Data:
+{market_context}
 
 User Profile JSON:
 {profile_json}
 """
 
-async def generate_recommendations(profile: Dict[str, Any]) -> Dict[str, Any]:
+NO_MARKET_DATA = "No market data snapshot is available."
+
+# Recommendation sections, in display order (key -> heading)
+SECTIONS = {
+    "asset_allocation": "Asset Allocation",
+    "investment_vehicles": "Recommended Investments",
+    "emergency_fund": "Emergency Fund & Liquidity",
+    "savings_plan": "Savings & Budget Plan",
+    "goal_plans": "Goal-Based Plans",
+    "behavioral_guidance": "Staying on Track",
+}
+
+# Which sections depend on which profile fields (dotted path prefixes).
+# The longest matching prefix wins; fields not listed affect every section.
+FIELD_SECTION_DEPENDENCIES = {
+    "userProfile.demographics": ["asset_allocation", "investment_vehicles", "goal_plans"],
+    "userProfile.demographics.location": ["investment_vehicles"],
+    "userProfile.demographics.maritalStatus": ["emergency_fund", "goal_plans"],
+    "userProfile.demographics.dependents": ["emergency_fund", "goal_plans"],
+    "userProfile.financialSnapshot": ["asset_allocation", "emergency_fund", "savings_plan", "goal_plans"],
+    "userProfile.financialSnapshot.jobStability": ["emergency_fund", "asset_allocation"],
+    "userProfile.investmentProfile": ["asset_allocation", "investment_vehicles"],
+    "userProfile.investmentProfile.investmentKnowledge": ["investment_vehicles", "behavioral_guidance"],
+    "userProfile.behavioralTraits": ["savings_plan", "behavioral_guidance"],
+    "financialGoals": ["goal_plans", "savings_plan"],
+    "riskAppetite": ["asset_allocation", "investment_vehicles", "behavioral_guidance"],
+    "riskAppetite.life_context": ["asset_allocation", "emergency_fund", "goal_plans"],
+    "lifestyleAndPreferences": ["savings_plan", "goal_plans"],
+    "lifestyleAndPreferences.financialPhilosophy": ["asset_allocation", "behavioral_guidance"],
+}
+
+# Attempts to get every requested section back when regenerating only part of the plan
+PARTIAL_ATTEMPTS = 2
+
+REUSED_SECTIONS_NOTE = """
+The following sections of the user's current plan are being kept unchanged. Do not rewrite them, but keep the sections you write consistent with them:
+{sections}
+"""
+
+_RECOMMENDATION_TEMPLATE = PromptTemplate(RECOMMENDATION_PROMPT)
+_REUSED_SECTIONS_TEMPLATE = PromptTemplate(REUSED_SECTIONS_NOTE)
+
+def sections_affected_by(fields: Iterable[str]) -> List[str]:
+    """Recommendation sections that must be regenerated when the given profile fields change"""
+    affected = set()
+    for field in fields:
+        parts = field.split(".")
+        for end in range(len(parts), 0, -1):
+            sections = FIELD_SECTION_DEPENDENCIES.get(".".join(parts[:end]))
+            if sections is not None:
+                affected.update(sections)
+                break
+        else:
+            return list(SECTIONS)
+    return [key for key in SECTIONS if key in affected]
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """Split a response into sections by their markdown headings"""
+    by_heading = {heading.lower(): key for key, heading in SECTIONS.items()}
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("#"):
+            key = by_heading.get(line.lstrip("#").strip().strip("*").strip().lower())
+            if key is not None:
+                current = key
+                sections[current] = []
+                continue
+        if current is not None:
+            sections[current].append(line)
+    return {key: "\n".join(lines).strip() for key, lines in sections.items()}
+
+def render_sections(sections: Dict[str, str]) -> str:
+    return "\n\n".join(f"## {SECTIONS[key]}\n{sections[key]}" for key in SECTIONS if key in sections)
+
+async def _request_sections(profile_json: str, sections: List[str], reused: Dict[str, str]) -> str:
+    """Ask the model for the given sections; `reused` sections are passed along as context"""
+    prompt = _RECOMMENDATION_TEMPLATE.render(
+        section_headings="\n".join(f"## {SECTIONS[key]}" for key in sections),
+        reused_sections=_REUSED_SECTIONS_TEMPLATE.render(sections=render_sections(reused)) if reused else "",
+        market_context=get_market_context() or NO_MARKET_DATA,
+        profile_json=profile_json
+    )
+    logging.info(f"[RECOMMENDATION AGENT] Prompt sent to LLM (sections: {sections}):")
+    logging.info(prompt)
+    messages = [{"role": "user", "parts": [{"text": prompt}]}]
+    result = await query_gemini(messages, agent="recommendation")
+    logging.info(f"[RECOMMENDATION AGENT] Raw LLM response: {result}")
+    recommendations_text = ""
+    if result.get('candidates') and result['candidates'][0].get('content'):
+        recommendations_text = result['candidates'][0]['content']['parts'][0].get('text', '')
+        logging.info(f"[RECOMMENDATION AGENT] Final recommendations text: {recommendations_text}")
+    if not recommendations_text:
+        # Surface model errors (e.g. {"error": {"code": 429}}) instead of returning empty advice
+        raise RuntimeError(f"no recommendations in model response: {result.get('error') or 'empty response'}")
+    return recommendations_text
+
+async def generate_recommendations(profile: Dict[str, Any], sections: Optional[List[str]] = None,
+                                   previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Generate investment recommendations using LLM and (optionally) MCP data.
+    Generate investment recommendations using LLM and (optionally) the local market data snapshot.
+
+    When `sections` and `previous` are given, only those sections are regenerated
+    and the rest are reused from the previous recommendations. Every requested
+    section must come back (after a retry for missing ones), otherwise an error is returned.
     """
-    import json
+    previous_sections = (previous or {}).get("sections") or {}
+    if sections is None or set(previous_sections) != set(SECTIONS):
+        # Full generation (also when the previous response could not be split into sections)
+        sections = list(SECTIONS)
     try:
+        profile_json = compact_profile_json(profile)
         logging.info("[RECOMMENDATION AGENT] Received profile for recommendations:")
-        logging.info(json.dumps(profile, indent=2))
-        prompt = RECOMMENDATION_PROMPT.format(profile_json=json.dumps(profile, indent=2))
-        logging.info("[RECOMMENDATION AGENT] Prompt sent to LLM:")
-        logging.info(prompt)
-        messages = [{"role": "user", "parts": [{"text": prompt}]}]
-        result = await query_gemini(messages)
-        logging.info(f"[RECOMMENDATION AGENT] Raw LLM response: {result}")
-        recommendations_text = ""
-        if result.get('candidates') and result['candidates'][0].get('content'):
-            recommendations_text = result['candidates'][0]['content']['parts'][0].get('text', '')
-            logging.info(f"[RECOMMENDATION AGENT] Final recommendations text: {recommendations_text}")
+        logging.info(profile_json)
+        if len(sections) == len(SECTIONS):
+            recommendations_text = await _request_sections(profile_json, sections, {})
+            new_sections = parse_sections(recommendations_text)
+            regenerated = [key for key in SECTIONS if key in new_sections]
+        else:
+            regenerated_sections: Dict[str, str] = {}
+            for _ in range(PARTIAL_ATTEMPTS):
+                missing = [key for key in sections if key not in regenerated_sections]
+                if not missing:
+                    break
+                current = {**previous_sections, **regenerated_sections}
+                reused = {key: text for key, text in current.items() if key not in missing}
+                parsed = parse_sections(await _request_sections(profile_json, missing, reused))
+                regenerated_sections.update({key: parsed[key] for key in missing if parsed.get(key)})
+            missing = [key for key in sections if key not in regenerated_sections]
+            if missing:
+                raise ValueError(f"model did not return required sections: {missing}")
+            new_sections = {**previous_sections, **regenerated_sections}
+            recommendations_text = render_sections(new_sections)
+            regenerated = [key for key in SECTIONS if key in regenerated_sections]
         return {
             "recommendations_text": recommendations_text,
+            "sections": new_sections,
+            "regenerated_sections": regenerated,
             "timestamp": str(logging.Formatter().formatTime(logging.makeLogRecord({})))
         }
     except Exception as e:
@@ -1,8 +1,10 @@
 # agents/summary.py
 import json
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, Sequence
 from ..services.gemini_client import query_gemini
+from .history import build_transcript
+from .prompts import PromptTemplate, compact_json, compact_profile_json
 
 PROFILE_EXTRACTION_PROMPT = """
 You are a financial profile extraction agent. Your task is to analyze the conversation history and extract structured information into a specific JSON format.
@@ -151,36 +153,24 @@ def load_profile_schema():
         }
     }
 
-async def extract_profile_from_conversation(conversation_history: List[Dict]) -> Dict[str, Any]:
+# Schema text is serialized once and baked into the compiled extraction template
+PROFILE_SCHEMA_TEXT = compact_json(load_profile_schema())
+_EXTRACTION_TEMPLATE = PromptTemplate(PROFILE_EXTRACTION_PROMPT).partial(profile_schema=PROFILE_SCHEMA_TEXT)
+
+async def extract_profile_from_conversation(conversation_history: Sequence) -> Dict[str, Any]:
     """
     Extract structured profile from conversation history using LLM
     """
     try:
-        # Convert conversation history to text
-        conversation_text = ""
-        for msg in conversation_history:
-            role = msg.get("role", "")
-            if role == "user":
-                parts = msg.get("parts", [])
-                if parts and "text" in parts[0]:
-                    conversation_text += f"User: {parts[0]['text']}\n"
-            elif role == "model":
-                parts = msg.get("parts", [])
-                if parts and "text" in parts[0]:
-                    conversation_text += f"Assistant: {parts[0]['text']}\n"
-        
-        # Load schema
-        schema = load_profile_schema()
+        # Convert conversation history to text (cached per session for TurnStore views)
+        conversation_text = build_transcript(conversation_history)
         
         # Build the extraction prompt
-        prompt = PROFILE_EXTRACTION_PROMPT.format(
-            profile_schema=json.dumps(schema, indent=2),
-            conversation_text=conversation_text
-        )
+        prompt = _EXTRACTION_TEMPLATE.render(conversation_text=conversation_text)
         
         # Query LLM for extraction
         messages = [{"role": "user", "parts": [{"text": prompt}]}]
-        result = await query_gemini(messages)
+        result = await query_gemini(messages, agent="summary")
         
         # Parse response
         if result.get('candidates') and result['candidates'][0].get('content'):
@@ -203,9 +193,9 @@ async def extract_profile_from_conversation(conversation_history: List[Dict]) ->
             except json.JSONDecodeError as e:
                 logging.error(f"Failed to parse JSON from LLM response: {e}")
                 logging.error(f"Response was: {response_text}")
-                return schema  # Return empty schema as fallback
+                return load_profile_schema()  # Return empty schema as fallback
         
-        return schema  # Return empty schema as fallback
+        return load_profile_schema()  # Return empty schema as fallback
         
     except Exception as e:
         logging.error(f"Error in profile extraction: {e}")
@@ -246,7 +236,7 @@ async def get_profile_summary(profile: Dict[str, Any]) -> str:
     summary_prompt = f"""
     Create a brief, human-readable summary of this financial profile:
     
-    {json.dumps(profile, indent=2)}
+    {compact_profile_json(profile)}
     
     Focus on the key aspects: current situation, main goals, and risk profile.
     Keep it under 150 words and write in a friendly, professional tone.
@@ -254,7 +244,7 @@ async def get_profile_summary(profile: Dict[str, Any]) -> str:
     
     try:
         messages = [{"role": "user", "parts": [{"text": summary_prompt}]}]
-        result = await query_gemini(messages)
+        result = await query_gemini(messages, agent="summary")
         
         if result.get('candidates') and result['candidates'][0].get('content'):
             return result['candidates'][0]['content']['parts'][0].get('text', 'Profile summary unavailable.')
@@ -0,0 +1,232 @@
+# app/batch.py
+"""
+Offline batch runner: replays archived transcripts (or stored profiles) from a
+JSONL file through the summary and recommendation agents.
+
+Each input line is a JSON object with an optional "id" and either:
+    "conversation": [{"role": "user"|"model", "text": "..."} | Gemini-style {"role", "parts"}]
+    "profile":      {...an already extracted profile...}
+
+Results are written as JSONL in input order. Progress is checkpointed next to
+the output file (<output>.ckpt), so an interrupted run picks up where it
+stopped. Only a bounded window of records is ever held in memory.
+
+Usage:
+    python -m app.batch transcripts.jsonl results.jsonl --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from .agents.summary import extract_profile_from_conversation, load_profile_schema
+from .agents.recommendations import generate_recommendations
+from .services.gemini_client import close_client
+
+MODES = ("full", "profile", "recommend")
+
+
+class BatchStats:
+    def __init__(self, skipped: int = 0):
+        self.started = time.monotonic()
+        self.skipped = skipped
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def record(self, ok: bool):
+        self.processed += 1
+        if ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped_from_checkpoint": self.skipped,
+            "elapsed_seconds": round(elapsed, 2),
+            "records_per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def _to_wire_history(conversation):
+    """Accept both {"role", "text"} and Gemini {"role", "parts"} turns"""
+    history = []
+    for turn in conversation:
+        if "parts" in turn:
+            history.append(turn)
+        else:
+            history.append({"role": turn.get("role", "user"), "parts": [{"text": turn.get("text", "")}]})
+    return history
+
+
+async def process_record(record: Dict[str, Any], mode: str = "full") -> Dict[str, Any]:
+    """Run one input record through the agents and return its output record"""
+    result: Dict[str, Any] = {"id": record.get("id")}
+    profile = record.get("profile")
+    if mode != "recommend":
+        conversation = record.get("conversation")
+        if conversation is None:
+            raise ValueError("record has no 'conversation'")
+        profile = await extract_profile_from_conversation(_to_wire_history(conversation))
+        result["profile"] = profile
+        # The summary agent falls back to the empty schema when the model call or parsing fails
+        if profile == load_profile_schema():
+            raise RuntimeError("profile extraction failed (empty schema returned)")
+    if mode != "profile":
+        if profile is None:
+            raise ValueError("record has no 'profile'")
+        recommendations = await generate_recommendations(profile)
+        result["recommendations"] = recommendations
+        if "error" in recommendations:
+            raise RuntimeError(recommendations["error"])
+    return result
+
+
+class _Checkpoint:
+    """Tracks how many input lines are fully written and where the output ends"""
+
+    def __init__(self, output_path: str):
+        self.path = output_path + ".ckpt"
+
+    def load(self) -> Optional[Dict[str, int]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, input_line: int, output_offset: int):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"input_line": input_line, "output_offset": output_offset}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = 4, mode: str = "full",
+                    resume: bool = True, progress_every: float = 10.0) -> BatchStats:
+    """Stream input_path through the agents with bounded concurrency, writing output_path"""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+
+    checkpoint = _Checkpoint(output_path)
+    state = checkpoint.load() if resume and os.path.exists(output_path) else None
+    start_line = state["input_line"] if state else 0
+    out = open(output_path, "r+" if state else "w")
+    if state:
+        # Drop anything written after the last checkpoint (possibly a torn line)
+        out.truncate(state["output_offset"])
+        out.seek(state["output_offset"])
+        logging.info(f"[BATCH] Resuming from input line {start_line}")
+
+    stats = BatchStats(skipped=start_line)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    # Limits how far workers may run ahead of the in-order writer
+    window = asyncio.Semaphore(concurrency * 4)
+    done: Dict[int, Optional[str]] = {}
+    ready = asyncio.Event()
+
+    async def reader():
+        with open(input_path) as f:
+            for line_no, raw in enumerate(f):
+                if line_no < start_line:
+                    continue
+                await window.acquire()
+                await queue.put((line_no, raw))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            line_no, raw = item
+            if not raw.strip():
+                done[line_no] = None
+                ready.set()
+                continue
+            started = time.monotonic()
+            record = None
+            try:
+                record = json.loads(raw)
+                result = await process_record(record, mode)
+                result["status"] = "ok"
+            except Exception as e:
+                logging.error(f"[BATCH] Line {line_no} failed: {e}")
+                result = {"id": record.get("id") if isinstance(record, dict) else None,
+                          "status": "error", "error": str(e)}
+            result["line"] = line_no
+            result["elapsed_ms"] = round((time.monotonic() - started) * 1000)
+            stats.record(result["status"] == "ok")
+            done[line_no] = json.dumps(result, separators=(",", ":"))
+            ready.set()
+
+    async def writer(workers):
+        next_line = start_line
+        last_report = time.monotonic()
+        while True:
+            await ready.wait()
+            ready.clear()
+            while next_line in done:
+                line = done.pop(next_line)
+                if line is not None:
+                    out.write(line + "\n")
+                next_line += 1
+                window.release()
+            out.flush()
+            checkpoint.save(next_line, out.tell())
+            if time.monotonic() - last_report >= progress_every:
+                last_report = time.monotonic()
+                logging.info(f"[BATCH] Progress: {stats.as_dict()}")
+            if all(w.done() for w in workers) and not done:
+                return
+
+    try:
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        reader_task = asyncio.create_task(reader())
+        writer_task = asyncio.create_task(writer(workers))
+        await asyncio.gather(reader_task, *workers)
+        ready.set()
+        await writer_task
+        checkpoint.clear()
+    finally:
+        out.close()
+        await close_client()
+
+    logging.info(f"[BATCH] Finished: {stats.as_dict()}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch profile extraction and recommendations over JSONL")
+    parser.add_argument("input", help="Input JSONL of transcripts or profiles")
+    parser.add_argument("output", help="Output JSONL of results")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent records in flight")
+    parser.add_argument("--mode", choices=MODES, default="full",
+                        help="full: transcript -> profile -> recommendations; profile: extraction only; "
+                             "recommend: profile -> recommendations")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="Seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    stats = asyncio.run(run_batch(args.input, args.output, concurrency=args.concurrency, mode=args.mode,
+                                  resume=not args.no_resume, progress_every=args.progress_every))
+    print(json.dumps(stats.as_dict()))
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
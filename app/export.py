@@ -0,0 +1,51 @@
+# app/export.py
+"""
+Export archived advisor sessions (profiles and recommendations) as NDJSON.
+
+Usage:
+    python -m app.export --output sessions.ndjson.gz --gzip --stage complete --since 2026-01-01
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from .services.session_store import SESSION_ARCHIVE_PATH, export_ndjson, is_valid_cursor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream archived sessions as NDJSON")
+    parser.add_argument("--archive", default=SESSION_ARCHIVE_PATH, help="Session archive to read")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--cursor", type=int, default=0, help="Byte offset to resume from")
+    parser.add_argument("--limit", type=int, help="Maximum number of sessions to export")
+    parser.add_argument("--stage", help="Comma-separated stages to include")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only sessions updated at or after this ISO time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only sessions updated before this ISO time")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    if not is_valid_cursor(args.cursor, args.archive):
+        parser.error(f"--cursor {args.cursor} is not at a line boundary within {args.archive}")
+
+    chunks = export_ndjson(
+        cursor=args.cursor,
+        limit=args.limit,
+        stages=set(args.stage.split(",")) if args.stage else None,
+        since=args.since.isoformat() if args.since else None,
+        until=args.until.isoformat() if args.until else None,
+        compress=args.gzip,
+        path=args.archive,
+    )
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,36 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse, FileResponse
-from app.agents.coordinator import handle_user_input, get_workflow_status, reset_workflow
+from fastapi import FastAPI, Request, Header
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from app.agents.coordinator import handle_user_input, get_workflow_status, reset_workflow, update_profile
 from app.utils.sse import create_sse_event
+from app.services.market_data import market_data
+from app.services.market_mcp import router as market_mcp_router
+from app.services.gemini_client import close_client, set_deadline, get_latency_stats, timeout_counts, MODEL_ROUTES
+from app.services.session_store import export_ndjson, is_valid_cursor
+from datetime import datetime
+from typing import Optional
+import asyncio
+import hmac
 import os
 import logging
 
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# End-to-end budget for one /chat request; every model call made while serving it shares this deadline
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "90"))
+
 app = FastAPI()
+app.include_router(market_mcp_router)
+
+@app.on_event("startup")
+async def start_market_data_watcher():
+    """Load the market data snapshot and hot-reload it when the files change"""
+    await asyncio.to_thread(market_data.refresh_if_changed)
+    app.state.market_data_watcher = asyncio.create_task(market_data.watch())
+
+@app.on_event("shutdown")
+async def close_gemini_client():
+    await close_client()
 
 @app.post("/chat")
 async def chat(request: Request):
@@ -26,6 +51,7 @@ async def chat(request: Request):
             return StreamingResponse(error_stream(), media_type="text/event-stream")
         
         # Route through the multi-agent coordinator
+        set_deadline(CHAT_DEADLINE_SECONDS)
         stream = await handle_user_input(user_input)
         return StreamingResponse(stream, media_type="text/event-stream")
         
@@ -42,6 +68,7 @@ async def get_initial_message():
     """
     try:
         # This will trigger the initial system prompt from the conversational agent
+        set_deadline(CHAT_DEADLINE_SECONDS)
         stream = await handle_user_input()
         return StreamingResponse(stream, media_type="text/event-stream")
     except Exception as e:
@@ -86,6 +113,7 @@ async def get_extracted_profile():
             return {
                 "profile_available": True,
                 "profile": coordinator.user_profile,
+                "version": len(coordinator.profile_versions),
                 "extracted_at": coordinator.profile_extracted_at if hasattr(coordinator, 'profile_extracted_at') else None
             }
         else:
@@ -94,6 +122,35 @@ async def get_extracted_profile():
         logging.error(f"Error getting profile: {e}")
         return {"error": "Could not retrieve profile"}
 
+@app.patch("/profile")
+async def patch_profile(request: Request):
+    """
+    Partially update the extracted profile (e.g. {"userProfile": {"financialSnapshot": {"monthlyIncome": 9000}}}).
+    Creates a new profile version and regenerates only the recommendation sections that depend on the changed fields.
+    """
+    try:
+        changes = await request.json()
+        if not isinstance(changes, dict) or not changes:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "Provide a JSON object of profile fields to update."})
+        result = await update_profile(changes)
+        if result.get("status") == "error":
+            return JSONResponse(status_code=400, content=result)
+        return result
+    except Exception as e:
+        logging.error(f"Error updating profile: {e}")
+        return JSONResponse(status_code=500, content={"status": "error", "message": "Could not update profile"})
+
+@app.get("/profile/versions")
+async def get_profile_versions():
+    """List profile versions with the field-level diff of each update."""
+    from app.agents.coordinator import coordinator
+    return {
+        "versions": [
+            {key: value for key, value in version.items() if key != "profile"}
+            for version in coordinator.profile_versions
+        ]
+    }
+
 @app.get("/recommendations")
 async def get_recommendations():
     """
@@ -112,6 +169,38 @@ async def get_recommendations():
         logging.error(f"Error getting recommendations: {e}")
         return {"error": "Could not retrieve recommendations"}
 
+@app.get("/admin/export")
+def export_sessions(cursor: int = 0, limit: Optional[int] = None, stage: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None, gzip: bool = False,
+                    x_admin_token: Optional[str] = Header(None)):
+    """
+    Stream archived sessions (and the live one) as NDJSON, with profiles and recommendations.
+    The last line is {"next_cursor": ...}; pass it back as `cursor` to fetch the next page.
+    `stage` accepts a comma-separated list; `since`/`until` are ISO timestamps.
+    """
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"error": "Admin export is disabled (set ADMIN_TOKEN)"})
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse(status_code=401, content={"error": "Invalid admin token"})
+    try:
+        since = datetime.fromisoformat(since).isoformat() if since else None
+        until = datetime.fromisoformat(until).isoformat() if until else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "since/until must be ISO timestamps"})
+    # Validate before streaming: errors inside the stream would arrive after a 200 status
+    if not is_valid_cursor(cursor):
+        return JSONResponse(status_code=400, content={"error": "Invalid cursor"})
+    # A zero limit would return the same cursor forever to a client following next_cursor
+    if limit is not None and limit < 1:
+        return JSONResponse(status_code=400, content={"error": "limit must be at least 1"})
+    from app.agents.coordinator import coordinator
+    stages = set(stage.split(",")) if stage else None
+    # Sync generator: Starlette iterates it in a threadpool, keeping file reads off the event loop
+    chunks = export_ndjson(cursor=cursor, limit=limit, stages=stages, since=since, until=until,
+                           live_record=coordinator.snapshot(), compress=gzip)
+    headers = {"Content-Encoding": "gzip"} if gzip else None
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
+
 @app.get("/")
 def read_index():
     return FileResponse(os.path.join(os.path.dirname(__file__), "index.html"))
@@ -129,7 +218,10 @@ async def health_check():
             "conversational": "active",
             "summarization": "active", 
             "recommendation": "active"
-        }
+        },
+        "model_routes": MODEL_ROUTES,
+        "model_latency": get_latency_stats(),
+        "model_timeouts": timeout_counts
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+# app/services/answer_cache.py
+"""
+Shared answer cache for generic follow-up questions.
+
+Questions are normalized and embedded as hashed word and character n-gram
+vectors, with question scaffolding ("what is a") down-weighted so that only
+the subject of the question decides similarity; lookups find the nearest cached question through an inverted index
+over the hashed features and reuse its answer when the cosine similarity
+clears a threshold. Only questions classified as profile-independent
+("what is an index fund?") are cached; anything personal goes to the model.
+"""
+import math
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+
+FEATURE_BUCKETS = 1 << 20
+CHAR_NGRAM = 3
+STOP_WORD_WEIGHT = 0.1
+
+# Question scaffolding shared by most cached questions; it carries almost no
+# meaning, so it must not be what makes two questions look alike
+STOP_WORDS = frozenset((
+    "a an the what is are was were be does do did how why when where which who "
+    "can could would should will it its of to in on for and or about with "
+    "explain define describe tell me mean means meaning exactly actually really basically"
+).split())
+
+_FILLER = re.compile(r"^(?:(?:hi|hey|hello|ok|okay|so|and|also|please|thanks)\b[\s,]*)+"
+                     r"|^(?:can|could) you (?:please )?(?:tell me|explain)\s+")
+_CONTRACTION = re.compile(r"\b(what|how|where|who|why|when)(?:'s|s)\b")
+_NON_WORD = re.compile(r"[^a-z0-9\s]")
+
+# Markers that tie a question to this user's profile, to the advice they were given
+# ("why did you recommend bonds?"), or to current market timing ("is now a good time to buy?")
+_PERSONAL = re.compile(
+    r"\b(?:i|i'm|im|i've|ive|i'd|me|my|mine|myself|we|our|us)\b"
+    r"|\b(?:you|you're|youre|you've|you'd|your|yours)\b"
+    r"|\b(?:this|these|that|those|above|plan|portfolio|allocation)\b"
+    r"|\b(?:now|today|tonight|currently|current|lately|recently|soon|these days|at the moment)\b"
+    r"|\b(?:good|right|best|bad|wrong) time\b|\bthis (?:year|month|week)\b"
+    r"|[\d$€£₹%]"
+)
+_GENERIC_START = re.compile(
+    r"^(?:what|what's|whats|how|why|when|explain|define|describe|difference|is|are|does|do|can)\b"
+)
+
+
+def normalize_question(question: str) -> str:
+    text = " ".join(question.lower().split())
+    text = _CONTRACTION.sub(r"\1 is", _FILLER.sub("", text))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def is_profile_independent(question: str) -> bool:
+    """True for general-knowledge questions whose answer does not depend on the user"""
+    text = " ".join(question.lower().split())
+    text = _FILLER.sub("", text)
+    return bool(_GENERIC_START.match(text)) and not _PERSONAL.search(text)
+
+
+def _vectorize(normalized: str) -> Dict[int, float]:
+    counts: Dict[int, float] = {}
+    for word in normalized.split():
+        key = zlib.crc32(word.encode()) % FEATURE_BUCKETS
+        if word in STOP_WORDS:
+            counts[key] = counts.get(key, 0.0) + STOP_WORD_WEIGHT
+            continue
+        counts[key] = counts.get(key, 0.0) + 1.0
+        padded = f" {word} "
+        for i in range(len(padded) - CHAR_NGRAM + 1):
+            key = zlib.crc32(padded[i:i + CHAR_NGRAM].encode()) % FEATURE_BUCKETS
+            counts[key] = counts.get(key, 0.0) + 0.5
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+class _Entry:
+    __slots__ = ("vector", "answer", "created_at")
+
+    def __init__(self, vector, answer, created_at):
+        self.vector = vector
+        self.answer = answer
+        self.created_at = created_at
+
+
+class AnswerCache:
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl: float = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[int, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for feature in entry.vector:
+            keys = self._index.get(feature)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[feature]
+
+    def _nearest(self, vector: Dict[int, float]):
+        scores: Dict[str, float] = {}
+        for feature, weight in vector.items():
+            for key in self._index.get(feature, ()):
+                scores[key] = scores.get(key, 0.0) + weight * self._entries[key].vector[feature]
+        if not scores:
+            return None, 0.0
+        key = max(scores, key=scores.get)
+        return key, scores[key]
+
+    def lookup(self, question: str) -> Optional[str]:
+        vector = _vectorize(normalize_question(question))
+        now = time.monotonic()
+        key, score = self._nearest(vector)
+        # Expired neighbours are dropped until the nearest remaining entry is fresh
+        while key is not None and now - self._entries[key].created_at > self.ttl:
+            self._remove(key)
+            self.expirations += 1
+            key, score = self._nearest(vector)
+        if key is None or score < self.threshold:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key].answer
+
+    def store(self, question: str, answer: str):
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        if normalized in self._entries:
+            self._remove(normalized)
+        vector = _vectorize(normalized)
+        self._entries[normalized] = _Entry(vector, answer, time.monotonic())
+        for feature in vector:
+            self._index.setdefault(feature, set()).add(normalized)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed_profile_dependent": self.bypassed,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Global cache instance, shared by every session
+answer_cache = AnswerCache()
@@ -1,17 +1,139 @@
+import asyncio
+import contextvars
+import logging
 import os
+import time
+from collections import deque
 import httpx
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+REQUEST_TIMEOUT = 60  # Increase timeout to 60 seconds
+
+# Agent -> model routing table. Override a single agent with GEMINI_MODEL_<AGENT>,
+# e.g. GEMINI_MODEL_RECOMMENDATION=gemini-2.5-pro
+MODEL_ROUTES = {
+    agent: os.getenv(f"GEMINI_MODEL_{agent.upper()}", default)
+    for agent, default in {
+        "conversation": DEFAULT_MODEL,
+        "completeness": "gemini-2.5-flash-lite",  # one-word COMPLETE/INCOMPLETE answer
+        "summary": DEFAULT_MODEL,
+        "recommendation": DEFAULT_MODEL,
+        "followup": DEFAULT_MODEL,
+    }.items()
+}
+
+# Hedged requests: once a call has been outstanding longer than the given
+# latency percentile for its model, fire a duplicate and take whichever wins
+HEDGE_ENABLED = os.getenv("GEMINI_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 200
 
 headers = {
     "Content-Type": "application/json",
 }
 
-async def query_gemini(messages):
+# Absolute time.monotonic() deadline for the request currently being served
+_deadline = contextvars.ContextVar("gemini_deadline", default=None)
+_latencies = {}
+
+# Shared client so connections are pooled across calls (and across batch workers)
+_client = None
+
+def get_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def set_deadline(seconds):
+    """Bound every query_gemini call made from the current context to `seconds` from now"""
+    return _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+def clear_deadline():
+    _deadline.set(None)
+
+def remaining_time():
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+# Timeout counts by cause: the request's end-to-end deadline vs the per-call REQUEST_TIMEOUT
+timeout_counts = {"deadline_exceeded": 0, "request_timeout": 0}
+
+def _deadline_exceeded(agent):
+    timeout_counts["deadline_exceeded"] += 1
+    logging.warning(f"[GEMINI] Deadline exceeded for agent '{agent}'")
+    return {"error": {"code": 504, "message": "Deadline exceeded", "status": "DEADLINE_EXCEEDED"}}
+
+def _request_timeout(agent):
+    timeout_counts["request_timeout"] += 1
+    logging.warning(f"[GEMINI] Call for agent '{agent}' timed out after {REQUEST_TIMEOUT}s")
+    return {"error": {"code": 504, "message": "Request timed out", "status": "REQUEST_TIMEOUT"}}
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def get_latency_stats():
+    """p50/p95 latency per model over the recent window, in seconds"""
+    return {
+        model: {"samples": len(samples), "p50": round(_percentile(samples, 50), 3), "p95": round(_percentile(samples, 95), 3)}
+        for model, samples in _latencies.items() if samples
+    }
+
+async def _post(model, payload):
+    started = time.monotonic()
+    response = await get_client().post(f"{GEMINI_BASE_URL}/{model}:generateContent?key={GEMINI_API_KEY}", headers=headers, json=payload)
+    _latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(time.monotonic() - started)
+    return response.json()
+
+async def _hedged_post(model, payload):
+    samples = _latencies.get(model)
+    if not HEDGE_ENABLED or not samples or len(samples) < HEDGE_MIN_SAMPLES:
+        return await _post(model, payload)
+    primary = asyncio.ensure_future(_post(model, payload))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=_percentile(samples, HEDGE_PERCENTILE))
+        if not done:
+            logging.info(f"[GEMINI] Hedging slow {model} request")
+            tasks.add(asyncio.ensure_future(_post(model, payload)))
+        while True:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            # Fall back to the other request if one of them failed
+            if not pending:
+                return done.pop().result()
+            tasks = pending
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def query_gemini(messages, agent="conversation"):
     payload = {
         "contents": messages
     }
-    async with httpx.AsyncClient(timeout=60) as client:  # Increase timeout to 60 seconds
-        response = await client.post(f"{GEMINI_URL}?key={GEMINI_API_KEY}", headers=headers, json=payload)
-        return response.json()
+    model = MODEL_ROUTES.get(agent, DEFAULT_MODEL)
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        return _deadline_exceeded(agent)
+    timeout = REQUEST_TIMEOUT if remaining is None else min(remaining, REQUEST_TIMEOUT)
+    try:
+        return await asyncio.wait_for(_hedged_post(model, payload), timeout=timeout)
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        # Attribute the timeout to whichever limit actually ran out
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            return _deadline_exceeded(agent)
+        return _request_timeout(agent)
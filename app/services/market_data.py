@@ -0,0 +1,216 @@
+# app/services/market_data.py
+"""
+Local market-data snapshot used by the recommendation agent.
+
+A snapshot is a directory containing:
+    manifest.json  - {"as_of": "...", "columns": [{"name", "asset_class", "kind"}]}
+    series.npy     - float64 matrix, one row per trading day, one column per series
+                     (NaN where a series has no observation)
+
+Leading NaNs (a series that starts later) are dropped; interior gaps are
+forward-filled so trailing horizons keep counting trading-day rows. Price
+columns must be strictly positive; columns that are not are skipped.
+
+`kind` is either "price" (index levels / NAVs) or "yield" (rates in percent).
+The matrix is memory mapped, and all indicators are computed once per refresh,
+so serving a summary to an agent is a plain dictionary lookup.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MARKET_DATA_DIR = os.getenv(
+    "MARKET_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "market"),
+)
+MARKET_DATA_RELOAD_SECONDS = float(os.getenv("MARKET_DATA_RELOAD_SECONDS", "30"))
+
+MANIFEST_FILE = "manifest.json"
+SERIES_FILE = "series.npy"
+
+TRADING_DAYS = 252
+# Trailing horizons (label -> trading days) reported for every series
+HORIZONS = {"1M": 21, "3M": 63, "1Y": 252, "3Y": 756}
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Drop leading NaNs and carry the last observation over interior gaps"""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return values[:0]
+    first = int(valid.argmax())
+    values, valid = values[first:], valid[first:]
+    last_seen = np.maximum.accumulate(np.where(valid, np.arange(len(values)), 0))
+    return values[last_seen]
+
+
+def _trailing_returns(prices: np.ndarray) -> Dict[str, Optional[float]]:
+    last = prices[-1]
+    return {
+        label: float(last / prices[-days - 1] - 1.0) if len(prices) > days else None
+        for label, days in HORIZONS.items()
+    }
+
+
+def _price_indicators(prices: np.ndarray) -> Dict[str, Any]:
+    log_returns = np.diff(np.log(prices))
+    window = log_returns[-TRADING_DAYS:]
+    running_peak = np.maximum.accumulate(prices)
+    drawdowns = prices / running_peak - 1.0
+    return {
+        "last": float(prices[-1]),
+        "returns": _trailing_returns(prices),
+        "volatility_1y": float(window.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(window) > 1 else None,
+        "max_drawdown": float(drawdowns.min()),
+        "current_drawdown": float(drawdowns[-1]),
+    }
+
+
+def _yield_indicators(yields: np.ndarray) -> Dict[str, Any]:
+    last = yields[-1]
+    return {
+        "last": float(last),
+        "changes": {
+            label: float(last - yields[-days - 1]) if len(yields) > days else None
+            for label, days in HORIZONS.items()
+        },
+        "range_1y": [float(yields[-TRADING_DAYS:].min()), float(yields[-TRADING_DAYS:].max())],
+    }
+
+
+def _pct(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value * 100:+.1f}%"
+
+
+def _pp(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:+.2f}pp"
+
+
+def _format_series(name: str, kind: str, ind: Dict[str, Any]) -> str:
+    if kind == "yield":
+        changes = ind["changes"]
+        return f"{name} {ind['last']:.2f}% (1M {_pp(changes['1M'])}, 1Y {_pp(changes['1Y'])})"
+    returns = ind["returns"]
+    vol = ind["volatility_1y"]
+    return (f"{name} 1M {_pct(returns['1M'])}, 1Y {_pct(returns['1Y'])}, 3Y {_pct(returns['3Y'])}, "
+            f"vol {'n/a' if vol is None else f'{vol * 100:.1f}%'}, "
+            f"maxDD {_pct(ind['max_drawdown'])}, DD now {_pct(ind['current_drawdown'])}")
+
+
+class MarketDataCache:
+    """In-process cache of precomputed per-asset-class market summaries."""
+
+    def __init__(self, data_dir: str = MARKET_DATA_DIR):
+        self.data_dir = data_dir
+        self.as_of = None
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self.context_text: Optional[str] = None
+        self._mtime = None
+
+    def _snapshot_mtime(self):
+        try:
+            return (os.stat(os.path.join(self.data_dir, MANIFEST_FILE)).st_mtime_ns,
+                    os.stat(os.path.join(self.data_dir, SERIES_FILE)).st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def refresh_if_changed(self) -> bool:
+        """Reload the snapshot if its files changed since the last load"""
+        mtime = self._snapshot_mtime()
+        if mtime == self._mtime:
+            return False
+        if mtime is None:
+            logging.info(f"[MARKET DATA] No snapshot found in {self.data_dir}")
+            self._mtime = None
+            self.as_of, self.summaries, self.context_text = None, {}, None
+            return True
+        try:
+            self._load()
+            self._mtime = mtime
+            logging.info(f"[MARKET DATA] Loaded snapshot as of {self.as_of} ({len(self.summaries)} asset classes)")
+            return True
+        except Exception as e:
+            logging.error(f"[MARKET DATA] Failed to load snapshot: {e}")
+            return False
+
+    def _load(self):
+        with open(os.path.join(self.data_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        # Zero-copy view over the file; the OS pages in only what we touch
+        series = np.load(os.path.join(self.data_dir, SERIES_FILE), mmap_mode="r")
+        columns = manifest["columns"]
+        if series.ndim != 2 or series.shape[1] != len(columns):
+            raise ValueError(f"series shape {series.shape} does not match {len(columns)} manifest columns")
+        if "rows" in manifest and series.shape[0] != manifest["rows"]:
+            # Series replaced but manifest not yet; the next poll sees the new manifest and retries
+            raise ValueError(f"series has {series.shape[0]} rows, manifest expects {manifest['rows']}")
+
+        summaries: Dict[str, Dict[str, Any]] = {}
+        for idx, column in enumerate(columns):
+            values = _forward_fill(series[:, idx])
+            if len(values) < 2:
+                continue
+            kind = column.get("kind", "price")
+            if kind != "yield" and (values <= 0).any():
+                # Log returns and drawdowns are meaningless for non-positive prices
+                logging.error(f"[MARKET DATA] Skipping {column['name']}: price series has non-positive values")
+                continue
+            indicators = _yield_indicators(values) if kind == "yield" else _price_indicators(values)
+            entry = summaries.setdefault(column["asset_class"], {"series": {}, "lines": []})
+            entry["series"][column["name"]] = {"kind": kind, **indicators}
+            entry["lines"].append(_format_series(column["name"], kind, indicators))
+
+        for asset_class, entry in summaries.items():
+            entry["text"] = f"{asset_class}: " + "; ".join(entry.pop("lines"))
+
+        # Indicators are plain floats; drop the memory map so a replaced file can be released
+        del series
+        self.as_of = manifest.get("as_of")
+        self.summaries = summaries
+        self.context_text = (
+            f"Market data snapshot as of {self.as_of}:\n" + "\n".join(e["text"] for e in summaries.values())
+            if summaries else None
+        )
+
+    def get_summary(self, asset_class: str) -> Optional[Dict[str, Any]]:
+        return self.summaries.get(asset_class)
+
+    def asset_classes(self) -> List[str]:
+        return list(self.summaries)
+
+    async def watch(self, interval: float = MARKET_DATA_RELOAD_SECONDS):
+        """Poll the snapshot directory and hot-reload on change"""
+        while True:
+            # File reads and indicator math run off the event loop
+            await asyncio.to_thread(self.refresh_if_changed)
+            await asyncio.sleep(interval)
+
+
+def write_snapshot(data_dir: str, as_of: str, columns: List[Dict[str, str]], series: np.ndarray):
+    """Write a snapshot in the layout expected by MarketDataCache"""
+    os.makedirs(data_dir, exist_ok=True)
+    series = np.asarray(series, dtype=np.float64)
+    series_path = os.path.join(data_dir, SERIES_FILE)
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    # Write to temporary names and swap into place: the live cache may have the old
+    # series memory mapped, and a reader must never see a half-written file.
+    # The matrix goes first so a new manifest never points at old data.
+    with open(series_path + ".tmp", "wb") as f:
+        np.save(f, series)
+    os.replace(series_path + ".tmp", series_path)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump({"as_of": as_of, "rows": series.shape[0], "columns": columns}, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+# Global cache instance
+market_data = MarketDataCache()
+
+
+def get_market_context() -> Optional[str]:
+    """Compact text summary of all asset classes for prompt injection"""
+    return market_data.context_text
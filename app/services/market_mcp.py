@@ -0,0 +1,82 @@
+# app/services/market_mcp.py
+"""
+MCP-style local stand-in server for market data.
+
+Speaks the JSON-RPC 2.0 subset of the Model Context Protocol needed by tool
+clients (`initialize`, `tools/list`, `tools/call`) and serves the same
+precomputed summaries the recommendation agent reads in-process.
+"""
+import json
+from fastapi import APIRouter, Request
+from .market_data import market_data
+
+router = APIRouter()
+
+TOOLS = [
+    {
+        "name": "get_market_summary",
+        "description": "Precomputed returns, volatility and drawdowns for one asset class, or all of them.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"asset_class": {"type": "string"}},
+        },
+    },
+    {
+        "name": "list_asset_classes",
+        "description": "Asset classes available in the current market data snapshot.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+]
+
+
+def _text_result(payload) -> dict:
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))
+    return {"content": [{"type": "text", "text": text}], "isError": False}
+
+
+def _call_tool(name: str, arguments: dict) -> dict:
+    if name == "list_asset_classes":
+        return _text_result({"as_of": market_data.as_of, "asset_classes": market_data.asset_classes()})
+    if name == "get_market_summary":
+        asset_class = arguments.get("asset_class")
+        if asset_class is None:
+            return _text_result({"as_of": market_data.as_of, "summaries": market_data.summaries})
+        summary = market_data.get_summary(asset_class)
+        if summary is None:
+            return {"content": [{"type": "text", "text": f"Unknown asset class: {asset_class}"}], "isError": True}
+        return _text_result({"as_of": market_data.as_of, "asset_class": asset_class, **summary})
+    raise KeyError(name)
+
+
+@router.post("/mcp")
+async def mcp_endpoint(request: Request):
+    """JSON-RPC entry point for the market data MCP stand-in"""
+    try:
+        body = await request.json()
+    except Exception:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}}
+    if not isinstance(body, dict):
+        # Batches and other non-object payloads are not supported
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+
+    rpc_id = body.get("id")
+    method = body.get("method")
+    params = body.get("params") or {}
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": "2024-11-05",
+            "serverInfo": {"name": "financial-advisor-market-data", "version": "1.0"},
+            "capabilities": {"tools": {}},
+        }
+    elif method == "tools/list":
+        result = {"tools": TOOLS}
+    elif method == "tools/call":
+        try:
+            result = _call_tool(params.get("name"), params.get("arguments") or {})
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32602, "message": f"Unknown tool: {params.get('name')}"}}
+    else:
+        return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32601, "message": f"Method not found: {method}"}}
+
+    return {"jsonrpc": "2.0", "id": rpc_id, "result": result}
@@ -0,0 +1,114 @@
+# app/services/session_store.py
+"""
+Append-only NDJSON archive of finished advisor sessions.
+
+Every session that is reset is written as a single line. Reads stream the
+file line by line from a byte-offset cursor, so exports use constant memory
+no matter how many sessions have been archived.
+"""
+import os
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import orjson
+
+SESSION_ARCHIVE_PATH = os.getenv(
+    "SESSION_ARCHIVE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "sessions.ndjson"),
+)
+
+
+def archive_session(record: Dict[str, Any], path: str = SESSION_ARCHIVE_PATH):
+    """Append one session record to the archive"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(orjson.dumps(record) + b"\n")
+
+
+def matches(record: Dict[str, Any], stages=None, since: Optional[str] = None, until: Optional[str] = None) -> bool:
+    """Stage and time-range filter; since/until are ISO timestamps compared against updated_at"""
+    if stages and record.get("stage") not in stages:
+        return False
+    updated_at = record.get("updated_at") or ""
+    if since and updated_at < since:
+        return False
+    if until and updated_at >= until:
+        return False
+    return True
+
+
+def is_valid_cursor(cursor: int, path: str = SESSION_ARCHIVE_PATH) -> bool:
+    """A cursor must lie within the archive and at the start of a line"""
+    if cursor == 0:
+        return True
+    if cursor < 0 or not os.path.exists(path) or cursor > os.path.getsize(path):
+        return False
+    with open(path, "rb") as f:
+        f.seek(cursor - 1)
+        return f.read(1) == b"\n"
+
+
+def scan_archived(cursor: int = 0, path: str = SESSION_ARCHIVE_PATH) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset after line, raw line) for every complete line from byte offset `cursor`"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(cursor)
+        offset = cursor
+        for line in f:
+            if not line.endswith(b"\n"):
+                # A partially written last line; leave it for the next export
+                return
+            offset += len(line)
+            yield offset, line
+
+
+def export_ndjson(cursor: int = 0, limit: Optional[int] = None, stages=None, since: Optional[str] = None,
+                  until: Optional[str] = None, live_record: Optional[Dict[str, Any]] = None, compress: bool = False,
+                  path: str = SESSION_ARCHIVE_PATH, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Stream matching sessions as NDJSON chunks, followed by a final
+    {"next_cursor": ...} line (null once the archive and live session are exhausted).
+    Archived lines are passed through without re-serializing.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    filtered = bool(stages or since or until)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    buffer = []
+    buffered = 0
+    sent = 0
+    next_cursor = cursor
+    exhausted = True
+
+    def emit(data: bytes):
+        return compressor.compress(data) if compressor else data
+
+    for offset, line in scan_archived(cursor, path):
+        if limit is not None and sent >= limit:
+            exhausted = False
+            break
+        next_cursor = offset
+        if filtered and not matches(orjson.loads(line), stages, since, until):
+            continue
+        buffer.append(line)
+        buffered += len(line)
+        sent += 1
+        if buffered >= chunk_size:
+            chunk = emit(b"".join(buffer))
+            buffer, buffered = [], 0
+            if chunk:
+                yield chunk
+
+    # The live session comes after the archive; if it does not fit on this page the
+    # cursor stays at the end of the archive so the next page picks it up
+    live_pending = exhausted and live_record is not None and matches(live_record, stages, since, until)
+    if live_pending and (limit is None or sent < limit):
+        buffer.append(orjson.dumps(live_record) + b"\n")
+        live_pending = False
+    done = exhausted and not live_pending
+    buffer.append(orjson.dumps({"next_cursor": None if done else next_cursor}) + b"\n")
+    tail = emit(b"".join(buffer))
+    if compressor:
+        tail += compressor.flush()
+    yield tail
@@ -0,0 +1,61 @@
+"""
+Bytes per session held by the conversation history structure (message text
+excluded, it is shared by both layouts), legacy dict layout vs TurnStore.
+
+Run from the repo root:
+    python -m benchmarks.history_memory
+"""
+import tracemalloc
+
+from app.agents.conversations import SYSTEM_PROMPT, SYSTEM_TURN
+from app.agents.history import TurnStore
+
+TURN_COUNTS = (10, 100, 1000)
+SESSIONS = 20
+
+
+def _texts(turns):
+    # Built before measuring so both layouts reference the same strings
+    return [f"turn {i}: I earn about {1000 + i} a month and spend roughly half of it." for i in range(turns)]
+
+
+def legacy_session(texts):
+    history = [{"role": "model", "parts": [{"text": SYSTEM_PROMPT}]}]
+    for i, text in enumerate(texts):
+        if i % 2 == 0:
+            history.append({"role": "user", "parts": [{"text": text}]})
+        else:
+            # Raw Gemini content object as previously stored for model turns
+            history.append({"parts": [{"text": text}], "role": "model"})
+    return history
+
+
+def compact_session(texts):
+    store = TurnStore()
+    store.append_turn(SYSTEM_TURN)
+    for i, text in enumerate(texts):
+        store.append("user" if i % 2 == 0 else "model", text)
+    return store
+
+
+def measure(build, texts):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(texts) for _ in range(SESSIONS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) // SESSIONS
+
+
+def main():
+    print(f"{'turns':>6} {'legacy B/session':>18} {'compact B/session':>18} {'saved':>7}")
+    for turns in TURN_COUNTS:
+        texts = _texts(turns)
+        legacy = measure(legacy_session, texts)
+        compact = measure(compact_session, texts)
+        print(f"{turns:>6} {legacy:>18,} {compact:>18,} {1 - compact / legacy:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.services.answer_cache import AnswerCache, is_profile_independent
+
+
+@pytest.mark.parametrize("question", [
+    "What is an index fund?",
+    "what's an ETF",
+    "Why bonds?",
+    "How does compound interest work?",
+    "Could you tell me what an index fund is?",
+])
+def test_generic_questions_are_profile_independent(question):
+    assert is_profile_independent(question)
+
+
+@pytest.mark.parametrize("question", [
+    "why did you recommend bonds?",
+    "What do you think about gold?",
+    "Why is your plan so aggressive?",
+    "Is it a good time to buy gold?",
+    "Is now the right time to invest?",
+    "What are bond yields doing today?",
+    "What is my risk score?",
+    "Should I buy bonds?",
+    "How much is 20% of 5000?",
+])
+def test_personal_and_timing_questions_are_not_cached(question):
+    assert not is_profile_independent(question)
+
+
+def test_lookup_matches_near_duplicates():
+    cache = AnswerCache()
+    cache.store("What is an index fund?", "A fund that tracks an index.")
+    assert cache.lookup("what's an index fund") == "A fund that tracks an index."
+    assert cache.lookup("how does a bond work") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What is a bond?", "What is a bond fund?"),
+    ("What is selling?", "What is short selling?"),
+    ("Is an annuity safe?", "Is an annuity unsafe?"),
+    ("What is a Roth IRA?", "What is a traditional IRA?"),
+    ("What is a stock?", "What is a stock split?"),
+])
+def test_lookup_rejects_questions_about_a_different_subject(cached, asked):
+    cache = AnswerCache()
+    cache.store(cached, "cached answer")
+    assert cache.lookup(asked) is None
+
+
+@pytest.mark.parametrize("asked", [
+    "what's an index fund",
+    "What is an index fund exactly?",
+    "Could you explain what an index fund is?",
+])
+def test_lookup_ignores_question_scaffolding(asked):
+    cache = AnswerCache()
+    cache.store("What is an index fund?", "A fund that tracks an index.")
+    assert cache.lookup(asked) == "A fund that tracks an index."
+
+
+def test_lookup_skips_every_expired_neighbour():
+    cache = AnswerCache(threshold=0.5, ttl=0.05)
+    cache.store("What is an index fund?", "A1")
+    cache.store("What is an index fund exactly?", "A2")
+    time.sleep(0.1)
+    assert cache.lookup("what is an index fund") is None
+    assert cache.stats()["expirations"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    cache = AnswerCache(max_entries=2)
+    cache.store("What is an index fund?", "A")
+    cache.store("Why bonds?", "B")
+    cache.lookup("What is an index fund?")
+    cache.store("What is an ETF?", "C")
+    assert cache.lookup("Why bonds?") is None
+    assert cache.lookup("What is an index fund?") == "A"
+    assert cache.stats()["evictions"] == 1
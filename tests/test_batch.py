@@ -0,0 +1,97 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+import app.batch as batch
+
+
+@pytest.fixture
+def stub_agents(monkeypatch):
+    calls = []
+
+    async def extract(history):
+        calls.append(len(history))
+        await asyncio.sleep(random.random() / 200)
+        return {"turns": len(history)}
+
+    async def recommend(profile):
+        await asyncio.sleep(random.random() / 200)
+        return {"recommendations_text": f"plan for {profile['turns']} turns"}
+
+    monkeypatch.setattr(batch, "extract_profile_from_conversation", extract)
+    monkeypatch.setattr(batch, "generate_recommendations", recommend)
+    return calls
+
+
+def _write_input(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": i, "conversation": [{"role": "user", "text": "hi"}] * (i % 3 + 1)}) + "\n")
+
+
+def _read_output(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_results_are_written_in_input_order(tmp_path, stub_agents):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 40)
+
+    stats = asyncio.run(batch.run_batch(str(source), str(output), concurrency=5))
+
+    rows = _read_output(output)
+    assert [row["id"] for row in rows] == list(range(40))
+    assert all(row["status"] == "ok" for row in rows)
+    assert stats.succeeded == 40 and stats.failed == 0
+    assert not (tmp_path / "out.jsonl.ckpt").exists()
+
+
+def test_resume_from_checkpoint_skips_done_lines_and_drops_torn_output(tmp_path, stub_agents):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 30)
+    asyncio.run(batch.run_batch(str(source), str(output), concurrency=4))
+    with open(output) as f:
+        done = f.readlines()[:12]
+
+    # Simulate a crash after 12 records: checkpoint at line 12 plus a half-written line
+    with open(output, "w") as f:
+        f.writelines(done)
+        f.write('{"id": 12, "sta')
+    offset = sum(len(line.encode()) for line in done)
+    (tmp_path / "out.jsonl.ckpt").write_text(json.dumps({"input_line": 12, "output_offset": offset}))
+    stub_agents.clear()
+
+    stats = asyncio.run(batch.run_batch(str(source), str(output), concurrency=4))
+
+    assert len(stub_agents) == 18
+    assert stats.skipped == 12 and stats.processed == 18
+    assert [row["id"] for row in _read_output(output)] == list(range(30))
+
+
+def test_no_resume_starts_over(tmp_path, stub_agents):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 5)
+    (tmp_path / "out.jsonl.ckpt").write_text(json.dumps({"input_line": 3, "output_offset": 0}))
+    output.write_text("")
+
+    stats = asyncio.run(batch.run_batch(str(source), str(output), resume=False))
+
+    assert stats.processed == 5
+    assert [row["id"] for row in _read_output(output)] == list(range(5))
+
+
+def test_failures_are_reported_per_record(tmp_path, monkeypatch, stub_agents):
+    async def failing(profile):
+        return {"recommendations_text": "sorry", "error": "429"}
+
+    monkeypatch.setattr(batch, "generate_recommendations", failing)
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(source, 3)
+
+    stats = asyncio.run(batch.run_batch(str(source), str(output)))
+
+    assert stats.failed == 3
+    assert {row["status"] for row in _read_output(output)} == {"error"}
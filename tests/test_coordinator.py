@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+import app.agents.recommendations as recommendations
+from app.agents.conversations import chat_history
+from app.agents.coordinator import AgentCoordinator, WorkflowStage
+from app.agents.recommendations import SECTIONS
+
+
+@pytest.fixture(autouse=True)
+def clear_history():
+    yield
+    chat_history.clear()
+
+
+def test_profile_update_waits_for_running_recommendations(monkeypatch):
+    calls = []
+
+    async def fake_generate(profile, sections=None, previous=None):
+        calls.append((profile["userProfile"]["financialSnapshot"]["monthlyIncome"], sections))
+        await asyncio.sleep(0.05)
+        chosen = sections or list(SECTIONS)
+        new = {key: f"income {profile['userProfile']['financialSnapshot']['monthlyIncome']}" for key in chosen}
+        merged = {**(previous or {}).get("sections", {}), **new}
+        return {"recommendations_text": "", "sections": merged, "regenerated_sections": chosen, "timestamp": ""}
+
+    monkeypatch.setattr(recommendations, "generate_recommendations", fake_generate)
+
+    async def scenario():
+        coordinator = AgentCoordinator()
+        coordinator.user_profile = {"userProfile": {"financialSnapshot": {"monthlyIncome": 5000}}}
+        coordinator._record_profile_version("extraction", [])
+        coordinator.current_stage = WorkflowStage.RECOMMENDATION
+        coordinator._spawn("recommendation", coordinator._run_recommendations())
+        await asyncio.sleep(0.01)
+
+        result = await coordinator.update_profile({"userProfile": {"financialSnapshot": {"monthlyIncome": 9000}}})
+        return coordinator, result
+
+    coordinator, result = asyncio.run(scenario())
+
+    assert calls[0] == (5000, None)
+    assert calls[1][0] == 9000 and "savings_plan" in calls[1][1]
+    assert result["status"] == "updated" and result["version"] == 2
+    assert coordinator.current_stage == WorkflowStage.COMPLETE
+    assert coordinator.recommendations["profile_version"] == 2
+    assert coordinator.recommendations["sections"]["savings_plan"] == "income 9000"
+
+
+def test_only_detached_tasks_drop_the_request_deadline():
+    from app.services.gemini_client import remaining_time, set_deadline
+
+    async def scenario():
+        coordinator = AgentCoordinator()
+        seen = {}
+
+        async def record(name):
+            seen[name] = remaining_time()
+
+        set_deadline(30)
+        await coordinator._spawn("recommendation", record("recommendation"))
+        await coordinator._spawn("completeness_check", record("completeness_check"), detached=True)
+        return seen
+
+    seen = asyncio.run(scenario())
+
+    assert 0 < seen["recommendation"] <= 30
+    assert seen["completeness_check"] is None
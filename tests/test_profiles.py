@@ -0,0 +1,42 @@
+from app.agents.profiles import apply_patch, diff_profiles, invalid_fields
+from app.agents.summary import load_profile_schema
+
+
+def _profile():
+    return {
+        "userProfile": {"financialSnapshot": {"monthlyIncome": 5000, "monthlyExpenses": 3000}},
+        "financialGoals": {"shortTerm": ["car"]},
+    }
+
+
+def test_apply_patch_merges_nested_objects_without_mutating():
+    profile = _profile()
+    updated = apply_patch(profile, {"userProfile": {"financialSnapshot": {"monthlyIncome": 9000}}})
+    assert updated["userProfile"]["financialSnapshot"] == {"monthlyIncome": 9000, "monthlyExpenses": 3000}
+    assert profile == _profile()
+
+
+def test_apply_patch_replaces_lists_and_nulls():
+    updated = apply_patch(_profile(), {"financialGoals": {"shortTerm": ["house"]},
+                                       "userProfile": {"financialSnapshot": {"monthlyExpenses": None}}})
+    assert updated["financialGoals"]["shortTerm"] == ["house"]
+    assert updated["userProfile"]["financialSnapshot"]["monthlyExpenses"] is None
+
+
+def test_diff_profiles_reports_dotted_fields():
+    old = _profile()
+    new = apply_patch(old, {"userProfile": {"financialSnapshot": {"monthlyIncome": 9000}}, "riskAppetite": {"level": "high"}})
+    assert diff_profiles(old, new) == [
+        {"field": "userProfile.financialSnapshot.monthlyIncome", "old": 5000, "new": 9000},
+        {"field": "riskAppetite", "old": None, "new": {"level": "high"}},
+    ]
+    assert diff_profiles(old, apply_patch(old, {})) == []
+
+
+def test_invalid_fields_checks_nested_paths_against_the_schema():
+    schema = load_profile_schema()
+    assert invalid_fields({"userProfile": {"financialSnapshot": {"monthlyIncome": 1}}}, schema) == []
+    assert invalid_fields({"userProfile": {"financialSnapshot": {"salary": 1}}}, schema) == [
+        "userProfile.financialSnapshot.salary"]
+    assert invalid_fields({"userProfile": {"demographics": 5}, "nickname": "x"}, schema) == [
+        "userProfile.demographics", "nickname"]
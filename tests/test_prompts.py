@@ -0,0 +1,52 @@
+import pytest
+
+from app.agents.conversations import GENERAL_QUESTION_PROMPT
+from app.agents.coordinator import COMPLETENESS_PROMPT
+from app.agents.prompts import PromptTemplate, compact_profile_json
+from app.agents.recommendations import RECOMMENDATION_PROMPT, REUSED_SECTIONS_NOTE
+from app.agents.summary import PROFILE_EXTRACTION_PROMPT
+
+
+def _values(fields):
+    # Values containing braces must be inserted verbatim, never re-parsed
+    return {name: f"<{name} {{not a field}}>" for name in fields}
+
+
+@pytest.mark.parametrize("source", [PROFILE_EXTRACTION_PROMPT, RECOMMENDATION_PROMPT, REUSED_SECTIONS_NOTE])
+def test_render_matches_str_format(source):
+    template = PromptTemplate(source)
+    values = _values(template.fields)
+    assert template.render(**values) == source.format(**values)
+
+
+def test_partial_matches_str_format():
+    template = PromptTemplate(PROFILE_EXTRACTION_PROMPT)
+    values = _values(template.fields)
+    bound = template.partial(profile_schema=values["profile_schema"])
+    assert bound.fields == template.fields - {"profile_schema"}
+    assert bound.render(conversation_text=values["conversation_text"]) == PROFILE_EXTRACTION_PROMPT.format(**values)
+
+
+@pytest.mark.parametrize("template, fields", [
+    (COMPLETENESS_PROMPT, {"conversation_text"}),
+    (GENERAL_QUESTION_PROMPT, {"question"}),
+])
+def test_module_templates_expose_their_fields(template, fields):
+    assert template.fields == fields
+    rendered = template.render(**_values(fields))
+    assert "{not a field}" in rendered and "{" + next(iter(fields)) + "}" not in rendered
+
+
+def test_escaped_braces_render_as_literals():
+    assert PromptTemplate("{{x}} {y}").render(y=1) == "{x} 1"
+
+
+@pytest.mark.parametrize("source", ["{x:>10}", "{x!r}", "{a.b}", "{a[0]}", "{}", "{0}"])
+def test_unsupported_fields_are_rejected(source):
+    with pytest.raises(ValueError):
+        PromptTemplate(source)
+
+
+def test_compact_profile_json_drops_empty_values():
+    profile = {"a": None, "b": {"c": [], "d": 1}, "e": [{}, 2]}
+    assert compact_profile_json(profile) == '{"b":{"d":1},"e":[2]}'
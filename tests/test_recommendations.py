@@ -0,0 +1,74 @@
+import asyncio
+
+import app.agents.recommendations as recommendations
+from app.agents.recommendations import SECTIONS, parse_sections, render_sections, sections_affected_by
+
+
+def test_sections_affected_by_uses_the_longest_prefix():
+    assert sections_affected_by(["userProfile.demographics.location"]) == ["investment_vehicles"]
+    assert sections_affected_by(["userProfile.demographics.currentAge"]) == [
+        "asset_allocation", "investment_vehicles", "goal_plans"]
+    assert sections_affected_by(["financialGoals.shortTerm", "userProfile.financialSnapshot.jobStability"]) == [
+        "asset_allocation", "emergency_fund", "savings_plan", "goal_plans"]
+
+
+def test_sections_affected_by_unknown_field_affects_everything():
+    assert sections_affected_by(["financialGoals", "somethingNew"]) == list(SECTIONS)
+    assert sections_affected_by([]) == []
+
+
+def test_parse_sections_accepts_heading_variants_and_ignores_preamble():
+    text = "Here you go.\n# **Asset Allocation**\n60/40\n\n### emergency fund & liquidity\nSix months\n## Unknown\nstill emergency"
+    assert parse_sections(text) == {
+        "asset_allocation": "60/40",
+        "emergency_fund": "Six months\n## Unknown\nstill emergency",
+    }
+
+
+def test_render_and_parse_round_trip():
+    sections = {key: f"text for {key}" for key in SECTIONS}
+    assert parse_sections(render_sections(sections)) == sections
+
+
+def _fake_model(monkeypatch, replies):
+    calls = []
+
+    async def request_sections(profile_json, sections, reused):
+        calls.append((list(sections), sorted(reused)))
+        reply = replies.pop(0)
+        return render_sections({key: f"new {key}" for key in sections if key in reply})
+
+    monkeypatch.setattr(recommendations, "_request_sections", request_sections)
+    return calls
+
+
+def test_partial_generation_reuses_unaffected_sections(monkeypatch):
+    previous = {"sections": {key: f"old {key}" for key in SECTIONS}}
+    calls = _fake_model(monkeypatch, [SECTIONS])
+
+    result = asyncio.run(recommendations.generate_recommendations({}, sections=["emergency_fund"], previous=previous))
+
+    assert calls == [(["emergency_fund"], sorted(key for key in SECTIONS if key != "emergency_fund"))]
+    assert result["regenerated_sections"] == ["emergency_fund"]
+    assert result["sections"]["emergency_fund"] == "new emergency_fund"
+    assert result["sections"]["asset_allocation"] == "old asset_allocation"
+
+
+def test_partial_generation_retries_missing_sections_then_fails(monkeypatch):
+    previous = {"sections": {key: f"old {key}" for key in SECTIONS}}
+    calls = _fake_model(monkeypatch, [["savings_plan"], []])
+
+    result = asyncio.run(recommendations.generate_recommendations(
+        {}, sections=["savings_plan", "goal_plans"], previous=previous))
+
+    assert [sections for sections, _ in calls] == [["savings_plan", "goal_plans"], ["goal_plans"]]
+    assert "goal_plans" in result["error"]
+
+
+def test_partial_request_without_usable_previous_regenerates_everything(monkeypatch):
+    calls = _fake_model(monkeypatch, [SECTIONS])
+
+    result = asyncio.run(recommendations.generate_recommendations({}, sections=["goal_plans"], previous={"sections": {}}))
+
+    assert calls[0][0] == list(SECTIONS)
+    assert result["regenerated_sections"] == list(SECTIONS)
@@ -0,0 +1,96 @@
+import gzip
+import json
+
+import pytest
+
+from app import export
+from app.services.session_store import archive_session, export_ndjson, is_valid_cursor
+
+
+def _session(i, stage="complete"):
+    return {"session_id": f"s{i}", "stage": stage, "updated_at": f"2026-01-{i + 1:02d}T00:00:00"}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = str(tmp_path / "sessions.ndjson")
+    for i in range(5):
+        archive_session(_session(i, "complete" if i % 2 == 0 else "conversation"), path=path)
+    return path
+
+
+def _page(path, **kwargs):
+    lines = [json.loads(line) for line in b"".join(export_ndjson(path=path, **kwargs)).splitlines()]
+    return lines[:-1], lines[-1]["next_cursor"]
+
+
+def _follow(path, **kwargs):
+    ids, cursor, pages = [], 0, 0
+    while cursor is not None:
+        records, cursor = _page(path, cursor=cursor, **kwargs)
+        ids += [record["session_id"] for record in records]
+        pages += 1
+        assert pages < 20
+    return ids, pages
+
+
+def test_cursor_pagination_visits_every_session_once(archive):
+    records, cursor = _page(archive, limit=2)
+    assert [r["session_id"] for r in records] == ["s0", "s1"]
+    assert is_valid_cursor(cursor, archive)
+
+    assert _follow(archive, limit=2) == (["s0", "s1", "s2", "s3", "s4"], 3)
+
+
+def test_live_record_gets_its_own_page_when_the_last_page_is_full(archive):
+    live = _session(9, "recommendation")
+    records, cursor = _page(archive, cursor=0, limit=5, live_record=live)
+    assert len(records) == 5 and cursor is not None
+
+    records, cursor = _page(archive, cursor=cursor, limit=5, live_record=live)
+    assert [r["session_id"] for r in records] == ["s9"] and cursor is None
+
+    assert _follow(archive, limit=3, live_record=live)[0] == ["s0", "s1", "s2", "s3", "s4", "s9"]
+
+
+def test_filters_apply_to_archived_and_live_records(archive):
+    live = _session(9, "conversation")
+    ids, _ = _follow(archive, limit=1, stages={"complete"}, live_record=live)
+    assert ids == ["s0", "s2", "s4"]
+
+    ids, _ = _follow(archive, since="2026-01-02T00:00:00", until="2026-01-04T00:00:00", live_record=live)
+    assert ids == ["s1", "s2"]
+
+
+def test_gzip_output_matches_plain_output(archive):
+    plain = b"".join(export_ndjson(path=archive, limit=3))
+    compressed = b"".join(export_ndjson(path=archive, limit=3, compress=True, chunk_size=1))
+    assert gzip.decompress(compressed) == plain
+
+
+def test_partial_trailing_line_is_left_for_the_next_export(archive):
+    with open(archive, "ab") as f:
+        f.write(b'{"session_id": "half')
+    ids, _ = _follow(archive)
+    assert ids == ["s0", "s1", "s2", "s3", "s4"]
+
+
+def test_invalid_cursors_and_limits_are_rejected(archive):
+    assert not is_valid_cursor(3, archive)
+    assert not is_valid_cursor(10 ** 6, archive)
+    with pytest.raises(ValueError):
+        next(export_ndjson(path=archive, limit=0))
+    with pytest.raises(SystemExit):
+        export.main(["--archive", archive, "--limit", "0"])
+
+
+def test_admin_export_validates_token_and_limit(monkeypatch, archive):
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+    assert client.get("/admin/export").status_code == 401
+    assert client.get("/admin/export", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/admin/export", params={"limit": 0}, headers={"X-Admin-Token": "secret"}).status_code == 400